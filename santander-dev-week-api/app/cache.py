@@ -0,0 +1,187 @@
+"""
+Cache read-through dos payloads serializados de usuário e saldo.
+
+Os GETs de detalhe e saldo guardam os bytes JSON já prontos em um LRU com
+TTL em processo. As funções de escrita do crud marcam os usuários afetados
+com `invalidate_on_commit`; a invalidação acontece só depois do commit da
+sessão (evento after_commit), valendo igualmente para a pilha síncrona, a
+assíncrona e a fila de group commit.
+
+Com vários workers, cada processo tem seu próprio LRU e o after_commit só
+invalida o processo que fez a escrita: os outros continuariam servindo o
+saldo antigo até o TTL vencer. Para compartilhar as invalidações, configure
+CACHE_INVALIDATION_URL=redis://... (requer o pacote `redis`): cada
+invalidação é publicada em um canal e todos os workers descartam as
+entradas localmente. Sem essa URL, o cache vem desligado quando
+WEB_CONCURRENCY (lido pelo uvicorn e pelo gunicorn como número de workers)
+é maior que 1; CACHE_ENABLED=true liga mesmo assim, aceitando respostas
+até CACHE_TTL_SECONDS desatualizadas.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "30"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_INVALIDATION_URL = os.getenv("CACHE_INVALIDATION_URL", "")
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Vários workers sem invalidação compartilhada serviriam dados antigos
+CACHE_SAFE_BY_DEFAULT = WEB_CONCURRENCY <= 1 or CACHE_INVALIDATION_URL.startswith("redis")
+CACHE_ENABLED = os.getenv(
+    "CACHE_ENABLED", "true" if CACHE_SAFE_BY_DEFAULT else "false"
+).lower() in ("1", "true", "yes")
+
+# Tipos de payload guardados por usuário
+KINDS = ("user", "balance")
+
+# ========== BACKEND DE INVALIDAÇÃO ==========
+
+class LocalInvalidationBus:
+    """Invalidação apenas no processo atual (um único worker)"""
+
+    def publish(self, user_ids):
+        pass
+
+    def subscribe(self, callback):
+        pass
+
+
+class RedisInvalidationBus:
+    """Propaga invalidações entre workers via pub/sub do Redis"""
+
+    channel = "sdw:cache:invalidate"
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_INVALIDATION_URL exige o pacote 'redis' (pip install redis)")
+        self._client = redis.Redis.from_url(url)
+
+    def publish(self, user_ids):
+        self._client.publish(self.channel, json.dumps(sorted(user_ids)))
+
+    def subscribe(self, callback):
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+
+        def listen():
+            for message in pubsub.listen():
+                callback(json.loads(message["data"]))
+
+        threading.Thread(target=listen, name="cache-invalidation", daemon=True).start()
+
+# ========== CACHE LRU + TTL ==========
+
+class UserCache:
+    def __init__(self, ttl: float = CACHE_TTL_SECONDS, max_entries: int = CACHE_MAX_ENTRIES,
+                 bus=None, enabled: bool = True):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.bus = bus or LocalInvalidationBus()
+        self._entries = OrderedDict()  # (kind, user_id) -> (expira_em, payload)
+        # Geração da última invalidação de cada usuário: impede que uma
+        # leitura iniciada antes de uma escrita grave no cache o valor antigo
+        # depois da invalidação. Limitado a max_entries usuários; o descarte
+        # guarda a maior geração esquecida e recusa leituras anteriores a ela
+        self._generation = 0
+        self._versions = OrderedDict()  # user_id -> geração
+        self._forgotten = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.bus.subscribe(self.evict_users)
+
+    def lookup(self, kind: str, user_id: int):
+        """Retorna (payload ou None, versão); a versão vai para `store`"""
+        key = (kind, user_id)
+        with self._lock:
+            version = self._generation
+            entry = self._entries.get(key) if self.enabled else None
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], version
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None, version
+
+    def store(self, kind: str, user_id: int, payload: bytes, version: int):
+        if not self.enabled:
+            return
+        with self._lock:
+            if version < self._forgotten or self._versions.get(user_id, 0) > version:
+                return
+            self._entries[(kind, user_id)] = (time.monotonic() + self.ttl, payload)
+            self._entries.move_to_end((kind, user_id))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def evict_users(self, user_ids):
+        """Remove as entradas locais dos usuários (também chamado pelo bus)"""
+        with self._lock:
+            for user_id in user_ids:
+                self._generation += 1
+                self._versions[user_id] = self._generation
+                self._versions.move_to_end(user_id)
+                for kind in KINDS:
+                    self._entries.pop((kind, user_id), None)
+            while len(self._versions) > self.max_entries:
+                _, self._forgotten = self._versions.popitem(last=False)
+            self.invalidations += len(user_ids)
+
+    def invalidate_users(self, user_ids):
+        self.evict_users(user_ids)
+        self.bus.publish(user_ids)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "tracked_versions": len(self._versions),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def _build_bus():
+    if CACHE_INVALIDATION_URL.startswith("redis"):
+        return RedisInvalidationBus(CACHE_INVALIDATION_URL)
+    return LocalInvalidationBus()
+
+
+user_cache = UserCache(bus=_build_bus() if CACHE_ENABLED else None, enabled=CACHE_ENABLED)
+
+# ========== INVALIDAÇÃO NO COMMIT ==========
+
+def invalidate_on_commit(db: Session, *user_ids: int):
+    """Agenda a invalidação dos usuários para depois do commit da sessão"""
+    db.info.setdefault("invalidate_users", set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    user_ids = session.info.pop("invalidate_users", None)
+    if user_ids:
+        user_cache.invalidate_users(user_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("invalidate_users", None)
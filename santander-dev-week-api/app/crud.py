@@ -1,14 +1,171 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import case, delete, exists, false, func, insert, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session, joinedload, raiseload, selectinload
 from app import models
-from app.models import UserDB, AccountDB, CardDB, FeatureDB, NewsDB
+from app.cache import invalidate_on_commit
+from app.write_queue import get_write_queue
+from app.models import (
+    UserDB, AccountDB, CardDB, FeatureDB, NewsDB, UserFeatureDB, UserNewsDB,
+    TransactionDB, BalanceSnapshotDB,
+    AgencyStatsDB, BalanceBucketStatsDB, BALANCE_BUCKETS, balance_bucket
+)
+
+# ========== ESTRATÉGIAS DE CARREGAMENTO ==========
+# Cada endpoint declara quais relacionamentos precisa, evitando o N+1 do
+# lazy loading durante a serialização do UserResponse.
+#   - list:    account/card via JOIN (1:1) + features/news via SELECT IN
+#              (JOIN com a tabela de vínculo do catálogo)
+#              -> 3 queries por página, independente do tamanho
+#   - detail:  mesmo formato; JOIN nas coleções multiplicaria as linhas
+#   - balance: apenas a conta, sem carregar o usuário
+# Com fields=/include= a rota monta a estratégia com fields_strategy: só as
+# relações pedidas são carregadas e as outras ficam em raiseload.
+
+LOAD_STRATEGIES = {
+    "list": (
+        joinedload(UserDB.account),
+        joinedload(UserDB.card),
+        selectinload(UserDB.features),
+        selectinload(UserDB.news),
+    ),
+    "detail": (
+        joinedload(UserDB.account),
+        joinedload(UserDB.card),
+        selectinload(UserDB.features),
+        selectinload(UserDB.news),
+    ),
+    "minimal": (),
+}
+
+USER_RELATIONS = {
+    "account": joinedload(UserDB.account),
+    "card": joinedload(UserDB.card),
+    "features": selectinload(UserDB.features),
+    "news": selectinload(UserDB.news),
+}
+
+def fields_strategy(fields) -> tuple:
+    """Estratégia que carrega só as relações presentes em `fields`"""
+    return tuple(
+        option if name in fields else raiseload(getattr(UserDB, name))
+        for name, option in USER_RELATIONS.items()
+    )
+
+def user_query(db: Session, strategy="detail"):
+    """Query base de usuários com a estratégia de carregamento do endpoint
+    (nome em LOAD_STRATEGIES ou tupla de opções, ver fields_strategy)"""
+    options = LOAD_STRATEGIES[strategy] if isinstance(strategy, str) else strategy
+    return db.query(UserDB).options(*options)
+
+# ========== CATÁLOGO DE FEATURES E NEWS ==========
+# Features e comunicados iguais são gravados uma única vez; cada usuário só
+# tem linhas de vínculo (user_features / user_news) apontando para o catálogo.
+
+_CATALOG_LINKS = {
+    FeatureDB: (UserFeatureDB, "feature_id"),
+    NewsDB: (UserNewsDB, "news_id"),
+}
+_CATALOG_KEYS_PER_STATEMENT = 400
+
+def _dialect_insert(db: Session):
+    """insert() do dialeto em uso, com ON CONFLICT (PostgreSQL ou SQLite)"""
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+def _catalog_ids(db: Session, model, keys: list) -> dict:
+    """Ids do catálogo por (ícone, descrição), inserindo os que faltam"""
+    columns = tuple_(model.icon, model.description)
+    ids = {}
+
+    def _load(wanted):
+        for chunk in _chunks(wanted, _CATALOG_KEYS_PER_STATEMENT):
+            rows = db.execute(select(model.id, model.icon, model.description).where(columns.in_(chunk)))
+            ids.update(((icon, description), item_id) for item_id, icon, description in rows)
+
+    _load(keys)
+    missing = [key for key in keys if key not in ids]
+    if missing:
+        # DO NOTHING: outra transação pode ter criado o mesmo item nesse meio tempo
+        db.execute(
+            _dialect_insert(db)(model).on_conflict_do_nothing(index_elements=["icon", "description"]),
+            [{"icon": icon, "description": description} for icon, description in missing]
+        )
+        _load(missing)
+    return ids
+
+def _link_catalog(db: Session, model, links: list):
+    """Vincula itens do catálogo aos usuários.
+
+    links: [(user_id, [{"icon": ..., "description": ...}, ...]), ...]; a ordem
+    dos itens é a ordem de exibição e repetições do mesmo usuário são ignoradas.
+    """
+    link_model, column = _CATALOG_LINKS[model]
+    keys = [(item["icon"], item["description"]) for _, items in links for item in items]
+    if not keys:
+        return
+    ids = _catalog_ids(db, model, list(dict.fromkeys(keys)))
+    rows = dict.fromkeys(
+        (user_id, ids[(item["icon"], item["description"])])
+        for user_id, items in links for item in items
+    )
+    db.execute(insert(link_model), [{"user_id": user_id, column: item_id} for user_id, item_id in rows])
 
 # ========== OPERAÇÕES BÁSICAS ==========
 
-def get_user(db: Session, user_id: int):
-    return db.query(UserDB).filter(UserDB.id == user_id).first()
+def get_user(db: Session, user_id: int, strategy="detail"):
+    return user_query(db, strategy).filter(UserDB.id == user_id).first()
+
+def get_user_by_email(db: Session, email: str, strategy="detail"):
+    """Busca pelo índice único ix_users_email"""
+    return user_query(db, strategy).filter(UserDB.email == email).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(UserDB).offset(skip).limit(limit).all()
+def get_users(db: Session, skip: int = 0, limit: int = 100, strategy="list"):
+    return (
+        user_query(db, strategy)
+        .order_by(UserDB.id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+def get_users_after(db: Session, after_id: int = 0, limit: int = 100, strategy="list"):
+    """Paginação keyset: usa o índice de UserDB.id, custo constante em qualquer profundidade"""
+    return (
+        user_query(db, strategy)
+        .filter(UserDB.id > after_id)
+        .order_by(UserDB.id)
+        .limit(limit)
+        .all()
+    )
+
+def get_users_by_ids(db: Session, user_ids: list, strategy="list"):
+    """Usuários de uma lista de ids em uma única query IN, na ordem pedida
+    (ids inexistentes ficam de fora)"""
+    users = {
+        db_user.id: db_user
+        for db_user in user_query(db, strategy).filter(UserDB.id.in_(user_ids)).all()
+    }
+    return [users[user_id] for user_id in user_ids if user_id in users]
+
+def get_user_news(db: Session, user_id: int, before_id: int = None, limit: int = 50):
+    """Notícias do usuário, da mais recente para a mais antiga, paginadas por
+    keyset no id do vínculo (índice ix_user_news_user_id_id)"""
+    query = (
+        select(UserNewsDB.id, NewsDB.icon, NewsDB.description)
+        .join(NewsDB, NewsDB.id == UserNewsDB.news_id)
+        .where(UserNewsDB.user_id == user_id)
+    )
+    if before_id is not None:
+        query = query.where(UserNewsDB.id < before_id)
+    return db.execute(query.order_by(UserNewsDB.id.desc()).limit(limit)).all()
+
+def _flush_unique_email(db: Session):
+    """Flush que converte a violação de ix_users_email em ValueError"""
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise ValueError("E-mail já cadastrado")
 
 def create_user(db: Session, user_data: dict):
     # Extrair dados relacionados
@@ -17,33 +174,86 @@ def create_user(db: Session, user_data: dict):
     features_data = user_data.pop('features')
     news_data = user_data.pop('news')
     
-    # Criar usuário
+    # Criar usuário (flush só para obter o id; um único commit no final)
     db_user = UserDB(**user_data)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    _flush_unique_email(db)
+    invalidate_on_commit(db, db_user.id)
     
-    # Criar conta
+    # Criar conta, com o saldo inicial como lançamento de abertura no extrato
     db_account = AccountDB(**account_data, user_id=db_user.id)
     db.add(db_account)
+    db.flush()
+    record_transaction(db, db_account.id, "ABE", db_account.balance, db_account.balance)
     
     # Criar cartão
     db_card = CardDB(**card_data, user_id=db_user.id)
     db.add(db_card)
+    _track_accounts(db, [(account_data, card_data)], +1)
     
-    # Criar features
-    for feature in features_data:
-        db_feature = FeatureDB(**feature, user_id=db_user.id)
-        db.add(db_feature)
-    
-    # Criar news
-    for news_item in news_data:
-        db_news = NewsDB(**news_item, user_id=db_user.id)
-        db.add(db_news)
+    # Vincular features e news do catálogo
+    _link_catalog(db, FeatureDB, [(db_user.id, features_data)])
+    _link_catalog(db, NewsDB, [(db_user.id, news_data)])
     
     db.commit()
-    db.refresh(db_user)
-    return db_user
+    return get_user(db, db_user.id)
+
+def _insert_users(db: Session, users_data: list) -> list:
+    """Insere um lote de usuários completos com executemany por tabela"""
+    user_ids = db.execute(
+        insert(UserDB).returning(UserDB.id, sort_by_parameter_order=True),
+        [{"name": u["name"], "email": u.get("email")} for u in users_data]
+    ).scalars().all()
+    invalidate_on_commit(db, *user_ids)
+    
+    accounts = [{**u["account"], "user_id": user_id} for u, user_id in zip(users_data, user_ids)]
+    account_ids = db.execute(
+        insert(AccountDB).returning(AccountDB.id, sort_by_parameter_order=True),
+        accounts
+    ).scalars().all()
+    
+    # Conta nova: o lançamento de abertura é sempre o seq 1
+    db.execute(insert(TransactionDB), [
+        {
+            "account_id": account_id,
+            "seq": 1,
+            "kind": "ABE",
+            "amount": account["balance"],
+            "balance_after": account["balance"]
+        }
+        for account, account_id in zip(accounts, account_ids)
+    ])
+    db.execute(insert(CardDB), [
+        {**u["card"], "user_id": user_id} for u, user_id in zip(users_data, user_ids)
+    ])
+    _track_accounts(db, [(u["account"], u["card"]) for u in users_data], +1)
+    
+    _link_catalog(db, FeatureDB, [(user_id, u["features"]) for u, user_id in zip(users_data, user_ids)])
+    _link_catalog(db, NewsDB, [(user_id, u["news"]) for u, user_id in zip(users_data, user_ids)])
+    
+    return user_ids
+
+def create_users_bulk(db: Session, users_data: list) -> list:
+    """Cria um lote de usuários em uma transação.
+
+    Retorna, na ordem da entrada, o id criado ou a exceção de cada item. Se o
+    lote falhar, divide ao meio e tenta cada metade, até isolar os registros
+    com problema: as linhas boas continuam entrando em lotes (um registro
+    ruim em 500 custa ~2 log2(500) transações, não 500).
+    """
+    if not users_data:
+        return []
+    try:
+        user_ids = _insert_users(db, users_data)
+        db.commit()
+        return user_ids
+    except SQLAlchemyError as e:
+        db.rollback()
+        if len(users_data) == 1:
+            return [e]
+    
+    middle = len(users_data) // 2
+    return create_users_bulk(db, users_data[:middle]) + create_users_bulk(db, users_data[middle:])
 
 def update_user(db: Session, user_id: int, update_data: dict):
     db_user = get_user(db, user_id)
@@ -54,76 +264,660 @@ def update_user(db: Session, user_id: int, update_data: dict):
         if hasattr(db_user, key) and value is not None:
             setattr(db_user, key, value)
     
+    invalidate_on_commit(db, user_id)
+    _flush_unique_email(db)
     db.commit()
-    db.refresh(db_user)
-    return db_user
+    return get_user(db, user_id)
 
 def delete_user(db: Session, user_id: int) -> bool:
-    db_user = get_user(db, user_id)
+    db_user = get_user(db, user_id, strategy="minimal")
     if db_user:
+        row = db.execute(
+            select(AccountDB.agency, AccountDB.balance, AccountDB.limit,
+                   AccountDB.balance_bucket, CardDB.limit.label("card_limit"))
+            .outerjoin(CardDB, CardDB.user_id == AccountDB.user_id)
+            .where(AccountDB.user_id == user_id)
+        ).one_or_none()
+        if row is not None:
+            _track_accounts(
+                db,
+                [({"agency": row.agency, "balance": row.balance, "limit": row.limit},
+                  {"limit": row.card_limit})],
+                -1,
+                buckets=[row.balance_bucket]
+            )
+        
+        # Extrato e snapshots saem junto com a conta, em DELETEs em lote
+        account_ids = select(AccountDB.id).where(AccountDB.user_id == user_id)
+        for table in (TransactionDB, BalanceSnapshotDB):
+            db.execute(
+                delete(table)
+                .where(table.account_id.in_(account_ids))
+                .execution_options(synchronize_session=False)
+            )
+        # Só os vínculos: os itens do catálogo continuam valendo para os demais
+        for link_model, _ in _CATALOG_LINKS.values():
+            db.execute(
+                delete(link_model)
+                .where(link_model.user_id == user_id)
+                .execution_options(synchronize_session=False)
+            )
+        db.expire(db_user, ["features", "news"])
         db.delete(db_user)
+        invalidate_on_commit(db, user_id)
         db.commit()
         return True
     return False
 
 # ========== OPERAÇÕES BANCÁRIAS ==========
+# Cada mutação de saldo é um único UPDATE ... RETURNING com a regra de saldo
+# na cláusula WHERE: o banco aplica a alteração de forma atômica, sem
+# leitura prévia em Python e sem perda de atualizações concorrentes.
+# As funções _apply_* não fazem commit, para poderem compor transações maiores.
 
 def get_user_account(db: Session, user_id: int):
-    user = get_user(db, user_id)
-    return user.account if user else None
+    """Busca a conta direto pela FK, sem carregar o usuário (1 query)"""
+    return db.query(AccountDB).filter(AccountDB.user_id == user_id).first()
 
-def deposit_money(db: Session, user_id: int, amount: float):
-    account = get_user_account(db, user_id)
-    if account:
-        account.balance += amount
-        db.commit()
-        db.refresh(account)
-    return account
+def _account_exists(db: Session, user_id: int) -> bool:
+    stmt = select(exists().where(AccountDB.user_id == user_id))
+    return db.execute(stmt).scalar()
 
-def withdraw_money(db: Session, user_id: int, amount: float):
-    account = get_user_account(db, user_id)
-    if account:
-        # Verificar saldo suficiente
-        if amount > (account.balance + account.limit):
-            raise ValueError("Saldo insuficiente")
+def _update_balance(db: Session, stmt, delta: float):
+    """Executa o UPDATE de saldo com RETURNING e atualiza as estatísticas.
+
+    Retorna (account_id, novo saldo), ou None se o WHERE não casar.
+    """
+    row = db.execute(
+        stmt.returning(AccountDB.id, AccountDB.balance, AccountDB.agency, AccountDB.balance_bucket)
+    ).one_or_none()
+    if row is None:
+        return None
+    # O SQLite devolve no RETURNING o valor antes da afinidade da coluna
+    # (1010 em vez de 1010.0), então normalizamos para float
+    balance = float(row.balance)
+    _track_balance_change(db, row.id, row.agency, row.balance_bucket, balance, delta)
+    return row.id, balance
+
+def _credit(db: Session, user_id: int, amount: float):
+    stmt = (
+        update(AccountDB)
+        .where(AccountDB.user_id == user_id)
+        .values(balance=AccountDB.balance + amount)
+        .execution_options(synchronize_session=False)
+    )
+    return _update_balance(db, stmt, amount)
+
+def _debit(db: Session, user_id: int, amount: float):
+    """Debita se houver saldo + limite suficiente; None se o WHERE não casar"""
+    stmt = (
+        update(AccountDB)
+        .where(
+            AccountDB.user_id == user_id,
+            AccountDB.balance + AccountDB.limit >= amount
+        )
+        .values(balance=AccountDB.balance - amount)
+        .execution_options(synchronize_session=False)
+    )
+    return _update_balance(db, stmt, -amount)
+
+def _apply_deposit(db: Session, user_id: int, amount: float):
+    invalidate_on_commit(db, user_id)
+    credited = _credit(db, user_id, amount)
+    if credited is None:
+        return None
+    account_id, new_balance = credited
+    return record_transaction(db, account_id, "DEP", amount, new_balance)
+
+def _apply_withdraw(db: Session, user_id: int, amount: float):
+    invalidate_on_commit(db, user_id)
+    debited = _debit(db, user_id, amount)
+    if debited is None:
+        if not _account_exists(db, user_id):
+            return None
+        raise ValueError("Saldo insuficiente")
+    account_id, new_balance = debited
+    return record_transaction(db, account_id, "SAQ", -amount, new_balance)
+
+def _apply_transfer(db: Session, from_user_id: int, to_user_id: int, amount: float):
+    if from_user_id == to_user_id:
+        raise ValueError("Conta de origem e destino devem ser diferentes")
+    
+    invalidate_on_commit(db, from_user_id, to_user_id)
+    # Ordem fixa de lock (menor user_id primeiro) evita deadlock entre
+    # transferências cruzadas A->B e B->A
+    updated = {}
+    for user_id in sorted((from_user_id, to_user_id)):
+        if user_id == from_user_id:
+            result = _debit(db, user_id, amount)
+            if result is None and _account_exists(db, user_id):
+                raise ValueError("Saldo insuficiente para transferência")
+        else:
+            result = _credit(db, user_id, amount)
         
-        account.balance -= amount
+        if result is None:
+            raise ValueError("Uma das contas não existe")
+        updated[user_id] = result
+    
+    from_account_id, new_balance_from = updated[from_user_id]
+    to_account_id, new_balance_to = updated[to_user_id]
+    debit_entry = record_transaction(
+        db, from_account_id, "TRF", -amount, new_balance_from, counterparty=to_account_id
+    )
+    record_transaction(
+        db, to_account_id, "TRF", amount, new_balance_to, counterparty=from_account_id
+    )
+    
+    return {
+        "from_user": from_user_id,
+        "to_user": to_user_id,
+        "amount": amount,
+        "new_balance_from": new_balance_from,
+        "new_balance_to": new_balance_to,
+        "transaction_id": debit_entry.reference
+    }
+
+def _commit_or_rollback(db: Session, apply, *args):
+    # Com group commit ligado, a operação vai para a thread escritora e é
+    # confirmada junto com as demais do lote
+    write_queue = get_write_queue()
+    if write_queue is not None:
+        return write_queue.submit(apply, *args).result()
+    
+    try:
+        result = apply(db, *args)
         db.commit()
-        db.refresh(account)
-    return account
+    except Exception:
+        db.rollback()
+        raise
+    return result
+
+def deposit_money(db: Session, user_id: int, amount: float):
+    """Retorna o lançamento no extrato, ou None se a conta não existir"""
+    return _commit_or_rollback(db, _apply_deposit, user_id, amount)
+
+def withdraw_money(db: Session, user_id: int, amount: float):
+    """Retorna o lançamento no extrato, ou None se a conta não existir"""
+    return _commit_or_rollback(db, _apply_withdraw, user_id, amount)
 
 def transfer_money(db: Session, from_user_id: int, to_user_id: int, amount: float):
-    from_account = get_user_account(db, from_user_id)
-    to_account = get_user_account(db, to_user_id)
+    return _commit_or_rollback(db, _apply_transfer, from_user_id, to_user_id, amount)
+
+# ========== TRANSFERÊNCIAS EM LOTE ==========
+# O lote lê as contas envolvidas de uma vez (em ordem de user_id, com FOR
+# UPDATE onde o banco suporta), valida as transferências em memória na ordem
+# recebida e grava tudo com poucos statements: um UPDATE com CASE por grupo
+# de contas e um INSERT em lote no extrato. O UPDATE só casa se o saldo ainda
+# for o lido (compare-and-set); se outra transação mexeu nas contas no meio,
+# o lote é refeito.
+
+# Itens por transação no modo best_effort (atomic é sempre uma transação)
+TRANSFER_BATCH_CHUNK = 1000
+# Tentativas quando o compare-and-set detecta alteração concorrente
+TRANSFER_BATCH_RETRIES = 3
+# Contas por statement (IN e CASE ficam abaixo do limite de variáveis do SQLite)
+_ACCOUNTS_PER_STATEMENT = 500
+
+class BalanceConflict(Exception):
+    """Saldo alterado por outra transação entre a leitura e o UPDATE do lote"""
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _lock_accounts(db: Session, user_ids) -> dict:
+    """Contas por user_id, lidas (e travadas) em ordem crescente de user_id"""
+    if db.get_bind().dialect.name == "sqlite":
+        # Sem lock de linha (e o pysqlite nem abre transação em SELECT): um
+        # UPDATE vazio pega o lock de escrita antes da leitura, serializando
+        # o lote com os demais escritores
+        db.execute(
+            update(AccountDB).where(false()).values(balance=AccountDB.balance)
+            .execution_options(synchronize_session=False)
+        )
+    accounts = {}
+    for chunk in _chunks(sorted(user_ids), _ACCOUNTS_PER_STATEMENT):
+        rows = db.execute(
+            select(AccountDB.id, AccountDB.user_id, AccountDB.balance, AccountDB.limit,
+                   AccountDB.agency, AccountDB.balance_bucket)
+            .where(AccountDB.user_id.in_(chunk))
+            .order_by(AccountDB.user_id)
+            .with_for_update()
+        ).all()
+        accounts.update((row.user_id, row) for row in rows)
+    return accounts
+
+def _write_balances(db: Session, accounts: dict, balances: dict):
+    """UPDATE ... SET balance = CASE id ... WHERE (id, balance) IN (lidos)"""
+    agencies, buckets = {}, {}
+    for chunk in _chunks(sorted(balances), _ACCOUNTS_PER_STATEMENT):
+        read = [(accounts[user_id].id, accounts[user_id].balance) for user_id in chunk]
+        stmt = (
+            update(AccountDB)
+            .where(tuple_(AccountDB.id, AccountDB.balance).in_(read))
+            .values(
+                balance=case(
+                    {accounts[user_id].id: balances[user_id] for user_id in chunk},
+                    value=AccountDB.id
+                ),
+                balance_bucket=case(
+                    {accounts[user_id].id: balance_bucket(balances[user_id]) for user_id in chunk},
+                    value=AccountDB.id
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if db.execute(stmt).rowcount != len(chunk):
+            raise BalanceConflict()
+        
+        for user_id in chunk:
+            account = accounts[user_id]
+            totals = agencies.setdefault(account.agency, [0, 0.0, 0.0, 0.0])
+            totals[1] += balances[user_id] - account.balance
+            new_bucket = balance_bucket(balances[user_id])
+            if new_bucket != account.balance_bucket:
+                buckets[account.balance_bucket] = buckets.get(account.balance_bucket, 0) - 1
+                buckets[new_bucket] = buckets.get(new_bucket, 0) + 1
+    _bump_stats(db, agencies, buckets)
+
+def _record_transfers(db: Session, accounts: dict, planned: list) -> list:
+    """Insere os dois lançamentos de cada transferência; ids dos débitos"""
+    account_ids = {accounts[user_id].id for _, src, dst, *_ in planned for user_id in (src, dst)}
+    last_seq = {}
+    for chunk in _chunks(sorted(account_ids), _ACCOUNTS_PER_STATEMENT):
+        last_seq.update(db.execute(
+            select(TransactionDB.account_id, func.max(TransactionDB.seq))
+            .where(TransactionDB.account_id.in_(chunk))
+            .group_by(TransactionDB.account_id)
+        ).all())
     
-    if not from_account or not to_account:
-        raise ValueError("Uma das contas não existe")
+    entries, snapshots = [], []
+    for _, src, dst, amount, balance_from, balance_to in planned:
+        from_account, to_account = accounts[src].id, accounts[dst].id
+        for account_id, signed, balance_after, counterparty in (
+            (from_account, -amount, balance_from, to_account),
+            (to_account, amount, balance_to, from_account),
+        ):
+            seq = last_seq.get(account_id, 0) + 1
+            last_seq[account_id] = seq
+            entries.append({
+                "account_id": account_id,
+                "seq": seq,
+                "kind": "TRF",
+                "amount": signed,
+                "balance_after": balance_after,
+                "counterparty_account_id": counterparty
+            })
+            if seq % SNAPSHOT_INTERVAL == 0:
+                snapshots.append({"account_id": account_id, "seq": seq, "balance": balance_after})
     
-    # Verificar saldo suficiente
-    if amount > (from_account.balance + from_account.limit):
-        raise ValueError("Saldo insuficiente para transferência")
+    # executemany sem RETURNING (o SQLite insere linha a linha quando a ordem
+    # do RETURNING precisa ser garantida); os ids dos débitos vêm depois pela
+    # chave única (account_id, seq)
+    db.execute(insert(TransactionDB), entries)
+    if snapshots:
+        db.execute(insert(BalanceSnapshotDB), snapshots)
     
-    # Realizar transferência
-    from_account.balance -= amount
-    to_account.balance += amount
+    debit_keys = [(entry["account_id"], entry["seq"]) for entry in entries[::2]]
+    ids = {}
+    for chunk in _chunks(debit_keys, _ACCOUNTS_PER_STATEMENT):
+        ids.update(
+            ((row.account_id, row.seq), row.id)
+            for row in db.execute(
+                select(TransactionDB.id, TransactionDB.account_id, TransactionDB.seq)
+                .where(tuple_(TransactionDB.account_id, TransactionDB.seq).in_(chunk))
+            )
+        )
+    return [ids[key] for key in debit_keys]
+
+def _apply_transfer_batch(db: Session, items: list, atomic: bool) -> list:
+    """Valida e aplica (sem commit) uma lista de (índice, transferência).
+
+    Cada transferência vê o saldo deixado pelas anteriores do lote. Com
+    `atomic`, qualquer falha cancela o lote inteiro sem gravar nada.
+    """
+    user_ids = {t[key] for _, t in items for key in ("from_user_id", "to_user_id")}
+    accounts = _lock_accounts(db, user_ids)
+    balances = {}
+    planned, results = [], {}
     
-    db.commit()
+    for index, t in items:
+        src, dst, amount = t["from_user_id"], t["to_user_id"], t["amount"]
+        error = None
+        if src == dst:
+            error = "Conta de origem e destino devem ser diferentes"
+        elif src not in accounts or dst not in accounts:
+            error = "Uma das contas não existe"
+        else:
+            balance_from = balances.get(src, float(accounts[src].balance))
+            if balance_from + accounts[src].limit < amount:
+                error = "Saldo insuficiente para transferência"
+        if error is not None:
+            results[index] = {"index": index, "status": "failed", "error": error}
+            continue
+        
+        balances[src] = balance_from - amount
+        balances[dst] = balances.get(dst, float(accounts[dst].balance)) + amount
+        planned.append((index, src, dst, amount, balances[src], balances[dst]))
+    
+    if atomic and results:
+        for index, *_ in planned:
+            results[index] = {"index": index, "status": "rolled_back", "error": "Lote cancelado: outro item falhou"}
+        planned = []
+    
+    if planned:
+        invalidate_on_commit(db, *balances)
+        _write_balances(db, accounts, balances)
+        debit_ids = _record_transfers(db, accounts, planned)
+        for (index, _, _, _, balance_from, balance_to), entry_id in zip(planned, debit_ids):
+            results[index] = {
+                "index": index,
+                "status": "applied",
+                "transaction_id": f"TRF{entry_id}",
+                "new_balance_from": balance_from,
+                "new_balance_to": balance_to
+            }
+    
+    return [results[index] for index, _ in items]
+
+def transfer_batch(db: Session, transfers: list, atomic: bool = True) -> list:
+    """Executa várias transferências; retorna um resultado por item, na ordem.
+
+    atomic: uma transação, tudo ou nada. best_effort (atomic=False): aplica as
+    válidas e reporta as demais, em transações de TRANSFER_BATCH_CHUNK itens.
+    Levanta RuntimeError se os saldos mudarem concorrentemente em todas as
+    TRANSFER_BATCH_RETRIES tentativas.
+    """
+    items = list(enumerate(transfers))
+    chunk_size = len(items) if atomic else TRANSFER_BATCH_CHUNK
+    
+    results = []
+    for chunk in _chunks(items, max(chunk_size, 1)):
+        for _ in range(TRANSFER_BATCH_RETRIES):
+            try:
+                chunk_results = _apply_transfer_batch(db, chunk, atomic)
+                db.commit()
+                break
+            except BalanceConflict:
+                db.rollback()
+            except Exception:
+                db.rollback()
+                raise
+        else:
+            raise RuntimeError("Saldos alterados por operações concorrentes; reenvie o lote")
+        results.extend(chunk_results)
+    return results
+
+# ========== NOTÍCIAS EM LOTE ==========
+# POST /news/bulk: o lote inteiro em uma transação, com os statements em
+# blocos de NEWS_BULK_CHUNK itens. O vínculo user_news é único, então
+# reenviar um lote (retry do cliente) não duplica notícias.
+
+NEWS_BULK_CHUNK = 400
+
+def append_news_bulk(db: Session, items: list) -> list:
+    """Anexa notícias ({user_id, icon, description}) ao feed dos usuários.
+
+    Retorna, na ordem da entrada, um resultado por item: "appended",
+    "duplicate" (o usuário já tem essa notícia) ou "failed".
+    """
+    results = []
+    try:
+        for chunk in _chunks(items, NEWS_BULK_CHUNK):
+            user_ids = {item["user_id"] for item in chunk}
+            existing = set(db.execute(select(UserDB.id).where(UserDB.id.in_(user_ids))).scalars())
+            keys = [(item["icon"], item["description"]) for item in chunk if item["user_id"] in existing]
+            news_ids = _catalog_ids(db, NewsDB, list(dict.fromkeys(keys)))
+
+            pairs = [
+                (item["user_id"], news_ids[(item["icon"], item["description"])])
+                if item["user_id"] in existing else None
+                for item in chunk
+            ]
+            wanted = list({pair for pair in pairs if pair is not None})
+            linked = set()
+            if wanted:
+                linked = set(db.execute(
+                    select(UserNewsDB.user_id, UserNewsDB.news_id)
+                    .where(tuple_(UserNewsDB.user_id, UserNewsDB.news_id).in_(wanted))
+                ).all())
+
+            rows = []
+            for item, pair in zip(chunk, pairs):
+                if pair is None:
+                    results.append({"status": "failed", "error": f"Usuário {item['user_id']} não encontrado"})
+                elif pair in linked:
+                    results.append({"status": "duplicate"})
+                else:
+                    linked.add(pair)
+                    rows.append({"user_id": pair[0], "news_id": pair[1]})
+                    results.append({"status": "appended"})
+            if rows:
+                db.execute(
+                    _dialect_insert(db)(UserNewsDB).on_conflict_do_nothing(index_elements=["user_id", "news_id"]),
+                    rows
+                )
+                invalidate_on_commit(db, *{row["user_id"] for row in rows})
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        raise
+    return [{"index": index, **result} for index, result in enumerate(results)]
+
+# ========== EXTRATO (LEDGER) ==========
+# Lançamentos são apenas inseridos, na mesma transação da alteração de saldo.
+# `seq` é sequencial por conta; a chave (account_id, seq) serve tanto para o
+# extrato paginado quanto para a reconstrução do saldo a partir de snapshots.
+
+# Um snapshot do saldo a cada N lançamentos da conta
+SNAPSHOT_INTERVAL = 100
+
+def record_transaction(db: Session, account_id: int, kind: str, amount: float,
+                       balance_after: float, counterparty: int = None):
+    """Insere o lançamento (sem commit) e grava snapshot a cada SNAPSHOT_INTERVAL"""
+    last_seq = db.execute(
+        select(func.max(TransactionDB.seq)).where(TransactionDB.account_id == account_id)
+    ).scalar()
+    seq = (last_seq or 0) + 1
+    
+    entry = TransactionDB(
+        account_id=account_id,
+        seq=seq,
+        kind=kind,
+        amount=amount,
+        balance_after=balance_after,
+        counterparty_account_id=counterparty
+    )
+    db.add(entry)
+    if seq % SNAPSHOT_INTERVAL == 0:
+        db.add(BalanceSnapshotDB(account_id=account_id, seq=seq, balance=balance_after))
+    db.flush()
+    # Lançamento é imutável: desanexado, não é expirado no commit e pode ser
+    # lido depois sem um SELECT de refresh
+    db.expunge(entry)
+    return entry
+
+def get_transactions(db: Session, user_id: int, before_seq: int = None, limit: int = 50):
+    """Extrato mais recente primeiro, paginado por keyset em (account_id, seq)"""
+    query = (
+        db.query(TransactionDB)
+        .join(AccountDB, AccountDB.id == TransactionDB.account_id)
+        .filter(AccountDB.user_id == user_id)
+    )
+    if before_seq is not None:
+        query = query.filter(TransactionDB.seq < before_seq)
+    return query.order_by(TransactionDB.seq.desc()).limit(limit).all()
+
+def rebuild_balance(db: Session, account_id: int) -> float:
+    """Reconstrói o saldo pelo extrato: último snapshot + lançamentos posteriores.
+
+    Contas criadas antes do extrato existir não têm lançamento de abertura,
+    então o resultado só cobre a movimentação registrada.
+    """
+    snapshot = (
+        db.query(BalanceSnapshotDB)
+        .filter(BalanceSnapshotDB.account_id == account_id)
+        .order_by(BalanceSnapshotDB.seq.desc())
+        .first()
+    )
+    base_seq, base_balance = (snapshot.seq, snapshot.balance) if snapshot else (0, 0.0)
     
+    delta = db.execute(
+        select(func.coalesce(func.sum(TransactionDB.amount), 0.0))
+        .where(TransactionDB.account_id == account_id, TransactionDB.seq > base_seq)
+    ).scalar()
+    return base_balance + delta
+
+# ========== ESTATÍSTICAS ==========
+# agency_stats e balance_bucket_stats são atualizadas na mesma transação de
+# cada mutação (criação, remoção e alteração de saldo), então o GET /stats lê
+# algumas linhas em vez de varrer as contas. Os totais acumulam os deltas em
+# float; rebuild_stats recalcula tudo a partir das contas (reconciliação).
+
+_AGENCY_TOTALS = ("users", "total_balance", "total_limit", "total_card_limit")
+
+def _upsert_increment(db: Session, model, key: str, columns: tuple, rows: list):
+    """INSERT ... ON CONFLICT DO UPDATE somando os valores às colunas"""
+    table = model.__table__
+    stmt = _dialect_insert(db)(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[key],
+        set_={column: table.c[column] + stmt.excluded[column] for column in columns}
+    )
+    db.execute(stmt, rows)
+
+def _bump_stats(db: Session, agencies: dict, buckets: dict):
+    """Soma deltas aos contadores.
+
+    agencies: {agência: [users, saldo, limite, limite do cartão]}
+    buckets: {faixa: users}
+    """
+    rows = [
+        dict(zip(("agency", *_AGENCY_TOTALS), (agency, *totals)))
+        for agency, totals in agencies.items()
+    ]
+    if rows:
+        _upsert_increment(db, AgencyStatsDB, "agency", _AGENCY_TOTALS, rows)
+    rows = [{"bucket": bucket, "users": users} for bucket, users in buckets.items() if users]
+    if rows:
+        _upsert_increment(db, BalanceBucketStatsDB, "bucket", ("users",), rows)
+
+def _track_accounts(db: Session, accounts: list, sign: int, buckets: list = None):
+    """Conta (sign=+1) ou desconta (-1) contas criadas/removidas nos totais.
+
+    accounts: [(dados da conta, dados do cartão)]; buckets: faixas gravadas,
+    quando já conhecidas (remoção).
+    """
+    agencies, bucket_deltas = {}, {}
+    for index, (account, card) in enumerate(accounts):
+        balance = account.get("balance") or 0.0
+        totals = agencies.setdefault(account["agency"], [0, 0.0, 0.0, 0.0])
+        totals[0] += sign
+        totals[1] += sign * balance
+        totals[2] += sign * (account.get("limit") or 0.0)
+        totals[3] += sign * ((card or {}).get("limit") or 0.0)
+        bucket = buckets[index] if buckets else balance_bucket(balance)
+        bucket_deltas[bucket] = bucket_deltas.get(bucket, 0) + sign
+    _bump_stats(db, agencies, bucket_deltas)
+
+def _track_balance_change(db: Session, account_id: int, agency: str, old_bucket: int,
+                          balance: float, delta: float):
+    """Soma o delta na agência e, se o saldo mudou de faixa, move a conta"""
+    buckets = {}
+    new_bucket = balance_bucket(balance)
+    if new_bucket != old_bucket:
+        db.execute(
+            update(AccountDB)
+            .where(AccountDB.id == account_id)
+            .values(balance_bucket=new_bucket)
+            .execution_options(synchronize_session=False)
+        )
+        buckets = {old_bucket: -1, new_bucket: 1}
+    _bump_stats(db, {agency: [0, delta, 0.0, 0.0]}, buckets)
+
+def _bucket_bounds(bucket: int):
+    low = BALANCE_BUCKETS[bucket - 1] if bucket > 0 else None
+    high = BALANCE_BUCKETS[bucket] if bucket < len(BALANCE_BUCKETS) else None
+    return low, high
+
+def get_stats(db: Session) -> dict:
+    """Estatísticas agregadas lidas das tabelas de resumo (sem varrer contas)"""
+    agencies = (
+        db.query(AgencyStatsDB)
+        .filter(AgencyStatsDB.users > 0)
+        .order_by(AgencyStatsDB.agency)
+        .all()
+    )
+    buckets = dict(db.query(BalanceBucketStatsDB.bucket, BalanceBucketStatsDB.users).all())
+    
+    total_users = sum(agency.users for agency in agencies)
+    total_balance = sum(agency.total_balance for agency in agencies)
     return {
-        "from_user": from_user_id,
-        "to_user": to_user_id,
-        "amount": amount,
-        "new_balance_from": from_account.balance,
-        "new_balance_to": to_account.balance
+        "total_users": total_users,
+        "total_balance": round(total_balance, 2),
+        "average_balance": round(total_balance / total_users, 2) if total_users else 0.0,
+        "total_limit": round(sum(agency.total_limit for agency in agencies), 2),
+        "total_card_limit": round(sum(agency.total_card_limit for agency in agencies), 2),
+        "balance_distribution": [
+            dict(zip(("min_balance", "max_balance"), _bucket_bounds(bucket)), users=buckets.get(bucket, 0))
+            for bucket in range(len(BALANCE_BUCKETS) + 1)
+        ],
+        "agencies": [
+            {
+                "agency": agency.agency,
+                "users": agency.users,
+                "total_balance": round(agency.total_balance, 2),
+                "average_balance": round(agency.total_balance / agency.users, 2),
+                "total_limit": round(agency.total_limit, 2),
+                "total_card_limit": round(agency.total_card_limit, 2)
+            }
+            for agency in agencies
+        ]
     }
 
+def rebuild_stats(db: Session):
+    """Recalcula faixas e totais a partir das contas (varredura completa)"""
+    db.execute(
+        update(AccountDB)
+        .values(balance_bucket=case(
+            *[(func.coalesce(AccountDB.balance, 0.0) < edge, bucket) for bucket, edge in enumerate(BALANCE_BUCKETS)],
+            else_=len(BALANCE_BUCKETS)
+        ))
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(delete(AgencyStatsDB))
+    db.execute(delete(BalanceBucketStatsDB))
+    db.execute(insert(AgencyStatsDB).from_select(
+        ["agency", *_AGENCY_TOTALS],
+        select(
+            AccountDB.agency,
+            func.count(),
+            func.coalesce(func.sum(AccountDB.balance), 0.0),
+            func.coalesce(func.sum(AccountDB.limit), 0.0),
+            func.coalesce(func.sum(CardDB.limit), 0.0)
+        )
+        .outerjoin(CardDB, CardDB.user_id == AccountDB.user_id)
+        .group_by(AccountDB.agency)
+    ))
+    db.execute(insert(BalanceBucketStatsDB).from_select(
+        ["bucket", "users"],
+        select(AccountDB.balance_bucket, func.count()).group_by(AccountDB.balance_bucket)
+    ))
+    db.commit()
+
 # ========== DADOS INICIAIS ==========
 
-def seed_initial_data(db: Session):
-    """Popula o banco com dados iniciais"""
-    # Verificar se já existem usuários
-    if db.query(UserDB).count() > 0:
-        return db.query(UserDB).all()
+def has_users(db: Session) -> bool:
+    """EXISTS na tabela de usuários (não conta nem carrega linhas)"""
+    return db.query(db.query(UserDB.id).exists()).scalar()
+
+def seed_initial_data(db: Session) -> int:
+    """Popula o banco com dados iniciais; retorna quantos usuários criou.
+
+    Idempotente: se já existe qualquer usuário não faz nada.
+    """
+    if has_users(db):
+        return 0
     
     # Dados do usuário 1 (igual API original)
     mock_user_1 = {
@@ -174,7 +968,7 @@ def seed_initial_data(db: Session):
     }
     
     # Criar usuários
-    user1 = create_user(db, mock_user_1)
-    user2 = create_user(db, mock_user_2)
+    create_user(db, mock_user_1)
+    create_user(db, mock_user_2)
     
-    return [user1, user2]
\ No newline at end of file
+    return 2
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+Versões assíncronas das operações de crud.
+
+Cada função executa a implementação síncrona de `app.crud` dentro de
+`AsyncSession.run_sync`: o I/O passa pelo driver assíncrono (aiosqlite,
+asyncpg) sem ocupar uma thread do threadpool, e a lógica de negócio
+continua em um único lugar.
+"""
+import asyncio
+from functools import wraps
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.write_queue import get_write_queue
+
+
+def _run_sync(fn):
+    @wraps(fn)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(fn, *args, **kwargs)
+    return wrapper
+
+# ========== OPERAÇÕES BÁSICAS ==========
+
+get_user = _run_sync(crud.get_user)
+get_user_by_email = _run_sync(crud.get_user_by_email)
+get_users = _run_sync(crud.get_users)
+get_users_after = _run_sync(crud.get_users_after)
+get_users_by_ids = _run_sync(crud.get_users_by_ids)
+get_user_news = _run_sync(crud.get_user_news)
+create_user = _run_sync(crud.create_user)
+create_users_bulk = _run_sync(crud.create_users_bulk)
+update_user = _run_sync(crud.update_user)
+delete_user = _run_sync(crud.delete_user)
+
+# ========== OPERAÇÕES BANCÁRIAS ==========
+
+def _queued_or_run_sync(fn, apply):
+    """Com group commit, aguarda o Future da fila sem bloquear o event loop"""
+    @wraps(fn)
+    async def wrapper(db: AsyncSession, *args):
+        write_queue = get_write_queue()
+        if write_queue is not None:
+            return await asyncio.wrap_future(write_queue.submit(apply, *args))
+        return await db.run_sync(fn, *args)
+    return wrapper
+
+get_user_account = _run_sync(crud.get_user_account)
+deposit_money = _queued_or_run_sync(crud.deposit_money, crud._apply_deposit)
+withdraw_money = _queued_or_run_sync(crud.withdraw_money, crud._apply_withdraw)
+transfer_money = _queued_or_run_sync(crud.transfer_money, crud._apply_transfer)
+transfer_batch = _run_sync(crud.transfer_batch)
+
+# ========== NOTÍCIAS EM LOTE ==========
+
+append_news_bulk = _run_sync(crud.append_news_bulk)
+
+# ========== EXTRATO (LEDGER) ==========
+
+get_transactions = _run_sync(crud.get_transactions)
+
+# ========== ESTATÍSTICAS ==========
+
+get_stats = _run_sync(crud.get_stats)
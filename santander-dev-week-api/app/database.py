@@ -1,33 +1,246 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 
+# Drivers assíncronos equivalentes aos drivers síncronos
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def to_async_url(url: str) -> str:
+    """Converte a URL síncrona para o driver assíncrono correspondente"""
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
 # Configuração do banco de dados
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./santander.db")
+SQLALCHEMY_ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL", to_async_url(SQLALCHEMY_DATABASE_URL)
+)
 
-# Configuração para SQLite
-connect_args = {}
-if "sqlite" in SQLALCHEMY_DATABASE_URL:
-    connect_args = {"check_same_thread": False}
+def to_read_only_url(url: str) -> str:
+    """Abre o mesmo arquivo SQLite em modo somente leitura (URI mode=ro).
 
-# Criar engine
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args=connect_args,
-    echo=True
+    Bancos em memória e servidores são devolvidos sem alteração; para uma
+    réplica de leitura, use DATABASE_READ_URL.
+    """
+    scheme, sep, path = url.partition(":///")
+    if not scheme.startswith("sqlite") or not sep or not path or ":memory:" in path or "?" in path:
+        return url
+    return f"{scheme}:///file:{path}?mode=ro&uri=true"
+
+SQLALCHEMY_READ_DATABASE_URL = os.getenv(
+    "DATABASE_READ_URL", to_read_only_url(SQLALCHEMY_DATABASE_URL)
+)
+SQLALCHEMY_ASYNC_READ_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_READ_URL", to_async_url(SQLALCHEMY_READ_DATABASE_URL)
 )
 
+# Tamanho do pool de leitura, ajustável separadamente do pool de escrita
+DB_READ_POOL_SIZE = os.getenv("DB_READ_POOL_SIZE")
+
+# "sync" (padrão) ou "async": qual pilha de banco os routers usam
+DB_MODE = os.getenv("DB_MODE", "sync")
+
+# ========== PERFIS DE ENGINE ==========
+# DB_PROFILE escolhe o perfil: dev (padrão, loga todo SQL), prod e bench.
+# Os PRAGMAs do SQLite são aplicados em cada conexão nova (evento connect).
+
+SQLITE_PROD_PRAGMAS = {
+    "journal_mode": "WAL",       # leitores não bloqueiam o escritor
+    "synchronous": "NORMAL",     # fsync só no checkpoint do WAL
+    "mmap_size": 268435456,      # 256 MB de leitura via mmap
+    "cache_size": -65536,        # 64 MB de page cache por conexão
+    "busy_timeout": 5000,        # espera o lock em vez de "database is locked"
+    "temp_store": "MEMORY",
+}
+
+ENGINE_PROFILES = {
+    "dev": {
+        "echo": True,
+        "pragmas": {},
+        "pool": {},
+    },
+    "prod": {
+        "echo": False,
+        "pragmas": SQLITE_PROD_PRAGMAS,
+        "pool": {"pool_size": 10, "max_overflow": 20, "pool_timeout": 30, "pool_recycle": 1800},
+    },
+    "bench": {
+        "echo": False,
+        "pragmas": SQLITE_PROD_PRAGMAS,
+        "pool": {"pool_size": 32, "max_overflow": 64, "pool_timeout": 30},
+    },
+}
+
+DB_PROFILE = os.getenv("DB_PROFILE", "dev")
+if DB_PROFILE not in ENGINE_PROFILES:
+    raise RuntimeError(f"DB_PROFILE inválido: {DB_PROFILE} (use {', '.join(ENGINE_PROFILES)})")
+
+def _is_sqlite_memory(url: str) -> bool:
+    return url.split("?")[0].rstrip("/") in ("sqlite:", "sqlite+aiosqlite:") or ":memory:" in url
+
+# PRAGMAs que alteram o arquivo e não podem rodar em conexão somente leitura
+SQLITE_WRITE_PRAGMAS = ("journal_mode",)
+
+def install_sqlite_pragmas(sync_engine, pragmas: dict):
+    """Aplica os PRAGMAs em toda conexão aberta pelo engine"""
+    if not pragmas or sync_engine.dialect.name != "sqlite":
+        return
+    
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def install_explicit_transactions(sync_engine, begin_sql: str = "BEGIN"):
+    """Receita do SQLAlchemy para o pysqlite: o driver só abre a transação no
+    primeiro INSERT/UPDATE e não antes de um SAVEPOINT, então cada RELEASE
+    virava um commit próprio. Desliga o BEGIN implícito e emite `begin_sql`
+    no início de cada transação"""
+    if sync_engine.dialect.name != "sqlite":
+        return
+    
+    @event.listens_for(sync_engine, "connect")
+    def disable_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+    
+    @event.listens_for(sync_engine, "begin")
+    def emit_begin(conn):
+        conn.exec_driver_sql(begin_sql)
+
+def create_profiled_engine(url: str, profile: str = DB_PROFILE, is_async: bool = False,
+                           read_only: bool = False, pool_size: int = None):
+    """Cria o engine (síncrono ou assíncrono) com as opções do perfil"""
+    settings = ENGINE_PROFILES[profile]
+    options = {"echo": settings["echo"]}
+    pragmas = settings["pragmas"]
+    if read_only:
+        pragmas = {k: v for k, v in pragmas.items() if k not in SQLITE_WRITE_PRAGMAS}
+    
+    if url.startswith("sqlite") and not is_async:
+        options["connect_args"] = {"check_same_thread": False}
+    
+    if settings["pool"] and not _is_sqlite_memory(url):
+        options.update(settings["pool"])
+        if pool_size is not None:
+            options["pool_size"] = pool_size
+        if is_async and url.startswith("sqlite"):
+            # O aiosqlite usa NullPool por padrão (uma conexão nova por sessão)
+            options["poolclass"] = AsyncAdaptedQueuePool
+    
+    if is_async:
+        new_engine = create_async_engine(url, **options)
+        install_sqlite_pragmas(new_engine.sync_engine, pragmas)
+    else:
+        new_engine = create_engine(url, **options)
+        install_sqlite_pragmas(new_engine, pragmas)
+    return new_engine
+
+def describe_engine(sync_engine) -> dict:
+    """Configuração efetiva do engine, lida da própria conexão"""
+    info = {
+        "profile": DB_PROFILE,
+        "echo": sync_engine.echo,
+        "pool": type(sync_engine.pool).__name__,
+    }
+    if hasattr(sync_engine.pool, "size"):
+        info["pool_size"] = sync_engine.pool.size()
+    if sync_engine.dialect.name == "sqlite":
+        with sync_engine.connect() as conn:
+            for name in ("journal_mode", "synchronous", "mmap_size", "cache_size", "busy_timeout"):
+                info[name] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+    return info
+
+# Criar engine (primário: todas as escritas)
+engine = create_profiled_engine(SQLALCHEMY_DATABASE_URL)
+
+# Engine assíncrono (aiosqlite por padrão): só existe em DB_MODE=async, então
+# o modo síncrono não precisa do driver nem abre pools que nunca usa
+async_engine = None
+if DB_MODE == "async":
+    async_engine = create_profiled_engine(SQLALCHEMY_ASYNC_DATABASE_URL, is_async=True)
+
+# Engines de leitura, com pool próprio: listagens longas não disputam
+# conexões com as escritas. Sem URL de leitura distinta, reaproveita o primário
+read_pool_size = int(DB_READ_POOL_SIZE) if DB_READ_POOL_SIZE else None
+if SQLALCHEMY_READ_DATABASE_URL == SQLALCHEMY_DATABASE_URL and read_pool_size is None:
+    read_engine = engine
+    async_read_engine = async_engine
+else:
+    read_engine = create_profiled_engine(
+        SQLALCHEMY_READ_DATABASE_URL, read_only=True, pool_size=read_pool_size
+    )
+    async_read_engine = None
+    if DB_MODE == "async":
+        async_read_engine = create_profiled_engine(
+            SQLALCHEMY_ASYNC_READ_DATABASE_URL, is_async=True, read_only=True, pool_size=read_pool_size
+        )
+
 # Criar sessão
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# expire_on_commit=False: atributos não podem ser recarregados de forma
+# implícita fora do contexto assíncrono depois do commit
+AsyncSessionLocal = AsyncReadSessionLocal = None
+if DB_MODE == "async":
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+    AsyncReadSessionLocal = async_sessionmaker(
+        bind=async_read_engine, autoflush=False, expire_on_commit=False
+    )
+
+def create_group_commit_sessionmaker():
+    """Sessões da thread escritora do group commit (GROUP_COMMIT=true).
+
+    No SQLite usa um engine próprio, de uma conexão, com BEGIN IMMEDIATE
+    explícito: os SAVEPOINTs de cada operação ficam dentro de uma única
+    transação e o lote inteiro sai em um commit. Os demais engines mantêm o
+    comportamento padrão do driver.
+    """
+    if engine.dialect.name != "sqlite" or _is_sqlite_memory(SQLALCHEMY_DATABASE_URL):
+        return SessionLocal
+    group_engine = create_profiled_engine(SQLALCHEMY_DATABASE_URL, pool_size=1)
+    install_explicit_transactions(group_engine, "BEGIN IMMEDIATE")
+    return sessionmaker(autocommit=False, autoflush=False, bind=group_engine)
 
 # Base para modelos
 Base = declarative_base()
 
-# Dependência para obter sessão
+# Dependência para obter sessão (primário, para escritas)
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+get_write_db = get_db
+
+# Dependência para obter sessão de leitura (GETs)
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Dependência assíncrona para obter sessão
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+get_async_write_db = get_async_db
+
+# Dependência assíncrona para obter sessão de leitura
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
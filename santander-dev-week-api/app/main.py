@@ -1,48 +1,114 @@
+import os
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
-from app.database import engine, get_db
-from app import models, crud
-from app.routers import users
+from app.database import (
+    engine, async_engine, read_engine, async_read_engine,
+    get_db, DB_MODE, DB_PROFILE, create_group_commit_sessionmaker, describe_engine
+)
+from app.cache import user_cache
+from app.metrics import PrometheusMiddleware, instrument_engine, pool_status, render_metrics
+from app.schema import DB_AUTO_MIGRATE, ensure_schema, stamped_revision
+from app.write_queue import GROUP_COMMIT, start_write_queue, stop_write_queue
 
-# ========== LIFESPAN ==========
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    print("🚀 Iniciando Santander Dev Week API...")
-    
-    # Criar tabelas
-    models.Base.metadata.create_all(bind=engine)
-    print("✅ Tabelas criadas")
+# Boot rápido (padrão fora do perfil dev): sem seed, sem Alembic e sem a lista
+# de endpoints no startup; migração e seed rodam antes, com `python -m app.seed --migrate`
+FAST_BOOT = os.getenv(
+    "FAST_BOOT", "false" if DB_PROFILE == "dev" else "true"
+).lower() in ("1", "true", "yes")
+SEED_ON_STARTUP = os.getenv(
+    "SEED_ON_STARTUP", "false" if FAST_BOOT else "true"
+).lower() in ("1", "true", "yes")
+
+# ========== BOOT ==========
+
+def seed_database():
+    """Popula os dados iniciais se o banco estiver vazio (EXISTS, sem carregar linhas)"""
+    from app import crud
     
-    # Popular dados iniciais
-    print("🌱 Populando dados iniciais...")
     db: Session = next(get_db())
     try:
-        crud.seed_initial_data(db)
-        print("✅ Dados iniciais criados")
+        created = crud.seed_initial_data(db)
+        if created:
+            print(f"🌱 {created} usuários iniciais criados")
     except Exception as e:
-        print(f"⚠️  Erro: {e}")
+        print(f"⚠️  Erro ao popular dados iniciais: {e}")
     finally:
         db.close()
-    
+
+def print_engine_settings():
+    """Configuração efetiva do banco (perfil, pool e PRAGMAs), em todo boot"""
+    settings = ", ".join(f"{key}={value}" for key, value in describe_engine(engine).items())
+    print(f"⚙️  Banco: {settings}")
+    if read_engine is not engine:
+        print(f"📖 Leituras em pool separado: {read_engine.url}")
+
+def print_banner():
+    """Lista de endpoints (só fora do FAST_BOOT)"""
     print("✅ API pronta!")
     print("📚 Documentação: http://localhost:8000/docs")
     print("🌐 Endpoints disponíveis:")
     print("   • GET  /           - Página inicial")
     print("   • GET  /health     - Health check")
+    print("   • GET  /metrics    - Métricas Prometheus")
     print("   • GET  /users      - Listar usuários")
     print("   • GET  /users/{id} - Buscar usuário")
     print("   • POST /users      - Criar usuário")
     print("   • POST /users/{id}/deposit  - Depósito")
     print("   • POST /users/{id}/withdraw - Saque")
     print("   • POST /users/{id}/transfer - Transferência")
+    print("   • POST /transfers/batch     - Transferências em lote")
+    print("   • GET  /stats      - Estatísticas agregadas")
     print("=" * 50)
+
+# ========== LIFESPAN ==========
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print("🚀 Iniciando Santander Dev Week API...")
+    
+    if FAST_BOOT and not DB_AUTO_MIGRATE:
+        # Só confere que o banco foi migrado (SQL puro, sem importar o Alembic)
+        revision = stamped_revision(engine)
+    else:
+        # Conferir (ou aplicar) as migrações em vez de create_all a cada boot
+        revision = ensure_schema(engine)
+    print(f"✅ Esquema do banco na revisão {revision}")
+    
+    print_engine_settings()
+    
+    if SEED_ON_STARTUP:
+        seed_database()
+    
+    if GROUP_COMMIT:
+        group_sessions = create_group_commit_sessionmaker()
+        instrument_engine(group_sessions.kw["bind"], "group_commit")
+        write_queue = start_write_queue(group_sessions)
+        print(f"✅ Group commit ativo (janela {write_queue.window * 1000:g} ms, lote até {write_queue.max_batch})")
+    
+    if FAST_BOOT:
+        print("✅ API pronta!")
+    else:
+        print_banner()
     
     yield
     
     print("🔴 Encerrando API...")
+    stop_write_queue()
+    if GROUP_COMMIT:
+        group_sessions.kw["bind"].dispose()
+    if DB_MODE == "async":
+        await async_engine.dispose()
+        if async_read_engine is not async_engine:
+            await async_read_engine.dispose()
 
 # ========== APLICAÇÃO FASTAPI ==========
 app = FastAPI(
@@ -63,8 +129,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Incluir rotas
-app.include_router(users.router)
+# Métricas Prometheus: latência por rota e statements SQL por engine
+app.add_middleware(PrometheusMiddleware)
+instrument_engine(engine, "write")
+instrument_engine(read_engine, "read")
+if DB_MODE == "async":
+    instrument_engine(async_engine, "async_write")
+    instrument_engine(async_read_engine, "async_read")
+
+# Incluir rotas (DB_MODE=async usa AsyncSession em vez do threadpool);
+# só o router do modo ativo é importado
+if DB_MODE == "async":
+    from app.routers import news_async, stats_async, transfers_async, users_async
+    app.include_router(users_async.router)
+    app.include_router(transfers_async.router)
+    app.include_router(news_async.router)
+    app.include_router(stats_async.router)
+else:
+    from app.routers import news, stats, transfers, users
+    app.include_router(users.router)
+    app.include_router(transfers.router)
+    app.include_router(news.router)
+    app.include_router(stats.router)
 
 # ========== ROTAS GLOBAIS ==========
 
@@ -81,29 +167,73 @@ async def root():
         },
         "endpoints": {
             "users": {
-                "list": "GET /users",
-                "get": "GET /users/{id}",
+                "list": "GET /users?fields=&include=",
+                "get": "GET /users/{id}?fields=&include=",
+                "get_by_email": "GET /users/by-email?email=",
+                "get_many": "GET /users?ids=1,2,3",
                 "create": "POST /users",
                 "create_simple": "POST /users/simple",
                 "update": "PUT /users/{id}",
                 "delete": "DELETE /users/{id}",
                 "balance": "GET /users/{id}/balance",
+                "news": "GET /users/{id}/news",
                 "deposit": "POST /users/{id}/deposit",
                 "withdraw": "POST /users/{id}/withdraw",
                 "transfer": "POST /users/{id}/transfer"
-            }
+            },
+            "transfers": {
+                "batch": "POST /transfers/batch"
+            },
+            "news": {
+                "bulk": "POST /news/bulk"
+            },
+            "stats": "GET /stats"
         }
     }
 
+def check_database(db_engine) -> dict:
+    """Executa SELECT 1 no engine e mede o tempo de resposta"""
+    start = time.perf_counter()
+    try:
+        with db_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except SQLAlchemyError as e:
+        return {"status": "down", "error": str(e.__cause__ or e)}
+    return {"status": "up", "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+
 @app.get("/health")
-async def health_check():
-    """Health check da API"""
+async def health_check(response: Response):
+    """Health check da API com conectividade real do banco e uso dos pools"""
+    # Conectividade testada pelo engine síncrono; pool reportado é o que atende as rotas
+    engines = {"write": (engine, async_engine)}
+    if read_engine is not engine:
+        engines["read"] = (read_engine, async_read_engine)
+    
+    database = {}
+    for name, (db_engine, db_async_engine) in engines.items():
+        database[name] = await run_in_threadpool(check_database, db_engine)
+        database[name].update(pool_status(db_async_engine if DB_MODE == "async" else db_engine))
+    
+    healthy = all(check["status"] == "up" for check in database.values())
+    if not healthy:
+        response.status_code = 503
     return {
-        "status": "healthy",
+        "status": "healthy" if healthy else "unhealthy",
         "service": "santander-dev-week-api",
-        "timestamp": "2023-10-01T12:00:00Z"
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "database": database
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas no formato texto do Prometheus"""
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Contadores do cache de usuário e saldo"""
+    return user_cache.stats()
+
 # ========== EXECUÇÃO ==========
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,185 @@
+"""
+Métricas Prometheus da API.
+
+- Middleware ASGI que registra, por rota (template, ex. /users/{user_id}),
+  um histograma de latência, o total de requisições por status e o número
+  de requisições em andamento.
+- Eventos do SQLAlchemy nos engines (escrita e leitura, síncronos e
+  assíncronos) que contam statements e tempo de banco, no total por engine
+  e por requisição.
+- `render_metrics()` gera o texto exposto em GET /metrics e `pool_status`
+  alimenta tanto as métricas de pool quanto o GET /health.
+
+As contagens por requisição usam um contextvar aberto pelo middleware; elas
+acompanham a requisição no threadpool e no AsyncSession. Operações aplicadas
+pela fila de group commit rodam em outra thread e entram só nos totais do
+engine. Com vários workers cada processo expõe os próprios contadores.
+"""
+import time
+from contextvars import ContextVar
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Registro próprio: evita duplicar métricas se o módulo for recarregado
+REGISTRY = CollectorRegistry()
+
+# Rotas não encontradas viram um único label para não explodir a cardinalidade
+UNMATCHED_ROUTE = "<unmatched>"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 250)
+
+# ========== MÉTRICAS HTTP ==========
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "Requisições HTTP por rota e status",
+    ("method", "route", "status"), registry=REGISTRY
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP",
+    ("method", "route"), buckets=LATENCY_BUCKETS, registry=REGISTRY
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requisições HTTP em andamento",
+    ("method",), registry=REGISTRY
+)
+
+# ========== MÉTRICAS DE BANCO ==========
+
+DB_STATEMENTS = Counter(
+    "db_statements_total", "Statements SQL executados",
+    ("engine",), registry=REGISTRY
+)
+DB_TIME = Counter(
+    "db_statement_seconds_total", "Tempo gasto executando statements SQL",
+    ("engine",), registry=REGISTRY
+)
+DB_STATEMENTS_PER_REQUEST = Histogram(
+    "db_statements_per_request", "Statements SQL por requisição HTTP",
+    ("method", "route"), buckets=STATEMENT_BUCKETS, registry=REGISTRY
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_seconds_per_request", "Tempo de banco por requisição HTTP",
+    ("method", "route"), buckets=LATENCY_BUCKETS, registry=REGISTRY
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size", "Tamanho configurado do pool de conexões",
+    ("engine",), registry=REGISTRY
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Conexões em uso no pool",
+    ("engine",), registry=REGISTRY
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Conexões abertas além do tamanho do pool",
+    ("engine",), registry=REGISTRY
+)
+
+# [statements, segundos] da requisição atual (None fora de uma requisição)
+_request_db_usage: ContextVar = ContextVar("request_db_usage", default=None)
+
+# Engines instrumentados: nome -> engine síncrono
+_engines = {}
+
+# ========== INSTRUMENTAÇÃO DO SQLALCHEMY ==========
+
+def instrument_engine(engine, name: str):
+    """Registra os eventos de contagem em um engine (aceita AsyncEngine)"""
+    sync_engine: Engine = getattr(engine, "sync_engine", engine)
+    if any(known is sync_engine for known in _engines.values()):
+        return
+    _engines[name] = sync_engine
+    statements = DB_STATEMENTS.labels(name)
+    seconds = DB_TIME.labels(name)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        statements.inc()
+        seconds.inc(elapsed)
+        usage = _request_db_usage.get()
+        if usage is not None:
+            usage[0] += 1
+            usage[1] += elapsed
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _discard_timer(exception_context):
+        # Statement com erro não chega ao after_cursor_execute
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+def pool_status(engine) -> dict:
+    """Uso do pool de conexões (pools sem fila, como StaticPool, só informam o tipo)"""
+    pool = getattr(engine, "sync_engine", engine).pool
+    status = {"pool": type(pool).__name__}
+    if hasattr(pool, "checkedout"):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            checked_in=pool.checkedin(),
+        )
+    return status
+
+# ========== MIDDLEWARE ==========
+
+class PrometheusMiddleware:
+    """Middleware ASGI com latência, status e statements SQL por rota"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        usage = [0, 0.0]
+        token = _request_db_usage.set(usage)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            _request_db_usage.reset(token)
+
+            # O router do FastAPI grava a rota encontrada no próprio scope
+            route = scope.get("route")
+            route = getattr(route, "path", UNMATCHED_ROUTE)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_LATENCY.labels(method, route).observe(elapsed)
+            DB_STATEMENTS_PER_REQUEST.labels(method, route).observe(usage[0])
+            DB_TIME_PER_REQUEST.labels(method, route).observe(usage[1])
+
+# ========== EXPOSIÇÃO ==========
+
+def render_metrics() -> bytes:
+    """Atualiza os gauges de pool e gera o texto no formato Prometheus"""
+    for name, engine in _engines.items():
+        status = pool_status(engine)
+        if "size" in status:
+            DB_POOL_SIZE.labels(name).set(status["size"])
+            DB_POOL_CHECKED_OUT.labels(name).set(status["checked_out"])
+            DB_POOL_OVERFLOW.labels(name).set(status["overflow"])
+    return generate_latest(REGISTRY)
+
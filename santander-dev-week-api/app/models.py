@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from bisect import bisect_right
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional
@@ -6,6 +7,17 @@ from datetime import datetime
 
 from app.database import Base
 
+# ========== FAIXAS DE SALDO ==========
+# Limites das faixas do GET /stats: faixa 0 = saldo negativo, faixa i = a
+# partir de BALANCE_BUCKETS[i - 1] (a última não tem teto)
+BALANCE_BUCKETS = (0.0, 1000.0, 5000.0, 10000.0, 50000.0, 100000.0)
+
+def balance_bucket(balance) -> int:
+    return bisect_right(BALANCE_BUCKETS, balance or 0.0)
+
+def _default_balance_bucket(context) -> int:
+    return balance_bucket(context.get_current_parameters().get("balance"))
+
 # ========== MODELOS DO BANCO (SQLAlchemy) ==========
 
 class UserDB(Base):
@@ -13,13 +25,19 @@ class UserDB(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
-    email = Column(String(100), nullable=True)
+    email = Column(String(100), nullable=True, unique=True, index=True)
     created_at = Column(String, default=datetime.now().isoformat())
     
     account = relationship("AccountDB", back_populates="user", cascade="all, delete-orphan", uselist=False)
     card = relationship("CardDB", back_populates="user", cascade="all, delete-orphan", uselist=False)
-    features = relationship("FeatureDB", back_populates="user", cascade="all, delete-orphan")
-    news = relationship("NewsDB", back_populates="user", cascade="all, delete-orphan")
+    # Catálogos compartilhados: o usuário só guarda os vínculos, na ordem em
+    # que foram criados. Os vínculos são apagados pelo crud (passive_deletes)
+    features = relationship(
+        "FeatureDB", secondary="user_features", order_by="UserFeatureDB.id", passive_deletes=True
+    )
+    news = relationship(
+        "NewsDB", secondary="user_news", order_by="UserNewsDB.id", passive_deletes=True
+    )
 
 class AccountDB(Base):
     __tablename__ = "accounts"
@@ -29,6 +47,8 @@ class AccountDB(Base):
     agency = Column(String(20), nullable=False)
     balance = Column(Float, default=0.0)
     limit = Column(Float, default=1000.0)
+    # Faixa atual do saldo: permite mover os contadores de stats sem saber o saldo anterior
+    balance_bucket = Column(Integer, nullable=False, default=_default_balance_bucket)
     
     user_id = Column(Integer, ForeignKey("users.id"), unique=True)
     user = relationship("UserDB", back_populates="account")
@@ -44,24 +64,90 @@ class CardDB(Base):
     user = relationship("UserDB", back_populates="card")
 
 class FeatureDB(Base):
+    """Catálogo de funcionalidades: cada (ícone, descrição) existe uma única vez"""
     __tablename__ = "features"
+    __table_args__ = (UniqueConstraint("icon", "description", name="uq_features_icon_description"),)
     
     id = Column(Integer, primary_key=True, index=True)
     icon = Column(String(10), nullable=False)
     description = Column(String(200), nullable=False)
-    
-    user_id = Column(Integer, ForeignKey("users.id"))
-    user = relationship("UserDB", back_populates="features")
 
 class NewsDB(Base):
+    """Notícias: um comunicado enviado a vários usuários é gravado uma vez"""
     __tablename__ = "news"
+    __table_args__ = (UniqueConstraint("icon", "description", name="uq_news_icon_description"),)
     
     id = Column(Integer, primary_key=True, index=True)
     icon = Column(String(10), nullable=False)
     description = Column(String(500), nullable=False)
+
+class UserFeatureDB(Base):
+    __tablename__ = "user_features"
+    __table_args__ = (UniqueConstraint("user_id", "feature_id", name="uq_user_features_user_feature"),)
+    
+    # id autoincremental preserva a ordem de exibição
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    feature_id = Column(Integer, ForeignKey("features.id"), nullable=False)
+
+class UserNewsDB(Base):
+    __tablename__ = "user_news"
+    __table_args__ = (
+        UniqueConstraint("user_id", "news_id", name="uq_user_news_user_news"),
+        # Feed paginado do GET /users/{id}/news, do vínculo mais recente para trás
+        Index("ix_user_news_user_id_id", "user_id", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    news_id = Column(Integer, ForeignKey("news.id"), nullable=False)
+
+class TransactionDB(Base):
+    """Lançamento do extrato (append-only), um por conta afetada"""
+    __tablename__ = "transactions"
+    __table_args__ = (
+        # Também é o índice do extrato paginado e da reconstrução de saldo
+        UniqueConstraint("account_id", "seq", name="uq_transactions_account_seq"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    seq = Column(Integer, nullable=False)
+    kind = Column(String(3), nullable=False)  # ABE, DEP, SAQ, TRF
+    amount = Column(Float, nullable=False)  # positivo = crédito, negativo = débito
+    balance_after = Column(Float, nullable=False)
+    counterparty_account_id = Column(Integer, nullable=True)
+    created_at = Column(String, nullable=False, default=lambda: datetime.now().isoformat())
     
-    user_id = Column(Integer, ForeignKey("users.id"))
-    user = relationship("UserDB", back_populates="news")
+    @property
+    def reference(self) -> str:
+        """Identificador exposto na API (ex.: DEP42)"""
+        return f"{self.kind}{self.id}"
+
+class BalanceSnapshotDB(Base):
+    """Saldo consolidado da conta após o lançamento `seq`"""
+    __tablename__ = "balance_snapshots"
+    
+    account_id = Column(Integer, ForeignKey("accounts.id"), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    balance = Column(Float, nullable=False)
+
+class AgencyStatsDB(Base):
+    """Totais por agência, mantidos incrementalmente pelas funções do crud"""
+    __tablename__ = "agency_stats"
+    
+    agency = Column(String(20), primary_key=True)
+    users = Column(Integer, nullable=False, default=0)
+    total_balance = Column(Float, nullable=False, default=0.0)
+    total_limit = Column(Float, nullable=False, default=0.0)
+    total_card_limit = Column(Float, nullable=False, default=0.0)
+
+class BalanceBucketStatsDB(Base):
+    """Contas por faixa de saldo (ver BALANCE_BUCKETS)"""
+    __tablename__ = "balance_bucket_stats"
+    
+    bucket = Column(Integer, primary_key=True)
+    users = Column(Integer, nullable=False, default=0)
 
 # ========== MODELOS PYDANTIC (SCHEMAS) ==========
 
@@ -110,6 +196,61 @@ class UserResponse(UserBase):
     news: List[NewsBase]
     model_config = ConfigDict(from_attributes=True)
 
+class UserPage(BaseModel):
+    items: List[UserResponse]
+    next_cursor: Optional[str] = None
+
+class NewsPage(BaseModel):
+    items: List[NewsBase]
+    next_cursor: Optional[str] = None
+
+class TransactionResponse(BaseModel):
+    transaction_id: str = Field(validation_alias="reference")
+    seq: int
+    kind: str
+    amount: float
+    balance_after: float
+    counterparty_account_id: Optional[int] = None
+    created_at: str
+    model_config = ConfigDict(from_attributes=True)
+
+class TransactionPage(BaseModel):
+    items: List[TransactionResponse]
+    next_cursor: Optional[str] = None
+
+class BulkItemResult(BaseModel):
+    index: int
+    status: str  # "created" ou "failed"
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkCreateResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkItemResult]
+
+class AgencyStats(BaseModel):
+    agency: str
+    users: int
+    total_balance: float
+    average_balance: float
+    total_limit: float
+    total_card_limit: float
+
+class BalanceBucketStats(BaseModel):
+    min_balance: Optional[float] = None  # None = sem piso (saldos negativos)
+    max_balance: Optional[float] = None  # None = sem teto
+    users: int
+
+class StatsResponse(BaseModel):
+    total_users: int
+    total_balance: float
+    average_balance: float
+    total_limit: float
+    total_card_limit: float
+    balance_distribution: List[BalanceBucketStats]
+    agencies: List[AgencyStats]
+
 # ========== MODELOS PARA REQUESTS POST ==========
 
 class DepositRequest(BaseModel):
@@ -122,6 +263,50 @@ class TransferRequest(BaseModel):
     to_user_id: int = Field(..., description="ID do usuário destino")
     amount: float = Field(..., gt=0, description="Valor da transferência")
 
+class TransferBatchItem(BaseModel):
+    from_user_id: int = Field(..., description="ID do usuário origem")
+    to_user_id: int = Field(..., description="ID do usuário destino")
+    amount: float = Field(..., gt=0, description="Valor da transferência")
+
+class TransferBatchRequest(BaseModel):
+    mode: str = Field("atomic", pattern="^(atomic|best_effort)$",
+                      description="atomic: tudo ou nada; best_effort: aplica as válidas")
+    transfers: List[TransferBatchItem] = Field(..., min_length=1, max_length=10000)
+
+class TransferBatchItemResult(BaseModel):
+    index: int
+    status: str  # "applied", "failed" ou "rolled_back"
+    transaction_id: Optional[str] = None
+    new_balance_from: Optional[float] = None
+    new_balance_to: Optional[float] = None
+    error: Optional[str] = None
+
+class TransferBatchResponse(BaseModel):
+    mode: str
+    applied: int
+    failed: int
+    results: List[TransferBatchItemResult]
+
+class NewsBulkItem(BaseModel):
+    user_id: int = Field(..., description="ID do usuário que recebe a notícia")
+    # Limites das colunas de NewsDB
+    icon: str = Field(..., min_length=1, max_length=10)
+    description: str = Field(..., min_length=1, max_length=500)
+
+class NewsBulkRequest(BaseModel):
+    items: List[NewsBulkItem] = Field(..., min_length=1, max_length=10000)
+
+class NewsBulkItemResult(BaseModel):
+    index: int
+    status: str  # "appended", "duplicate" ou "failed"
+    error: Optional[str] = None
+
+class NewsBulkResponse(BaseModel):
+    appended: int
+    duplicate: int
+    failed: int
+    results: List[NewsBulkItemResult]
+
 class SimpleUserCreate(BaseModel):
     name: str
     email: Optional[str] = None
@@ -0,0 +1,25 @@
+"""Cursores opacos para paginação keyset (seek method)"""
+import base64
+import json
+
+
+def encode_cursor(**position) -> str:
+    """Codifica a posição da última linha retornada em um token opaco"""
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, *keys: str) -> dict:
+    """Decodifica um token gerado por encode_cursor.
+
+    Levanta ValueError se o token for inválido ou não tiver as chaves esperadas.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+
+    if not isinstance(position, dict) or any(key not in position for key in keys):
+        raise ValueError("Cursor inválido")
+    return position
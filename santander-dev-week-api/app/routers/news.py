@@ -0,0 +1,33 @@
+"""Notícias em lote (POST /news/bulk)"""
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.database import get_db
+from app.models import NewsBulkRequest, NewsBulkResponse
+
+router = APIRouter(prefix="/news", tags=["news"])
+
+def build_bulk_response(results: list) -> NewsBulkResponse:
+    """Totais por status e o resultado de cada item"""
+    appended = sum(1 for result in results if result["status"] == "appended")
+    duplicate = sum(1 for result in results if result["status"] == "duplicate")
+    return NewsBulkResponse(
+        appended=appended,
+        duplicate=duplicate,
+        failed=len(results) - appended - duplicate,
+        results=results
+    )
+
+# ========== POST ENDPOINTS ==========
+
+@router.post("/bulk", response_model=NewsBulkResponse)
+def append_news_bulk(batch: NewsBulkRequest, db: Session = Depends(get_db)):
+    """Anexa notícias ao feed de vários usuários em uma transação.
+
+    Itens de usuários inexistentes saem como `failed` sem impedir os demais;
+    notícias que o usuário já tem saem como `duplicate`, então reenviar o
+    mesmo lote é seguro.
+    """
+    results = crud.append_news_bulk(db, [item.model_dump() for item in batch.items])
+    return build_bulk_response(results)
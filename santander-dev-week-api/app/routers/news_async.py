@@ -0,0 +1,18 @@
+"""Rotas de notícias sobre a pilha assíncrona (DB_MODE=async)"""
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud_async as crud
+from app.database import get_async_db
+from app.models import NewsBulkRequest, NewsBulkResponse
+from app.routers.news import build_bulk_response
+
+router = APIRouter(prefix="/news", tags=["news"])
+
+# ========== POST ENDPOINTS ==========
+
+@router.post("/bulk", response_model=NewsBulkResponse)
+async def append_news_bulk(batch: NewsBulkRequest, db: AsyncSession = Depends(get_async_db)):
+    """Anexa notícias ao feed de vários usuários em uma transação"""
+    results = await crud.append_news_bulk(db, [item.model_dump() for item in batch.items])
+    return build_bulk_response(results)
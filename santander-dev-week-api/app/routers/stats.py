@@ -0,0 +1,17 @@
+"""Estatísticas agregadas (GET /stats)"""
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.database import get_read_db
+from app.models import StatsResponse
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+# ========== GET ENDPOINTS ==========
+
+@router.get("", response_model=StatsResponse)
+def read_stats(db: Session = Depends(get_read_db)):
+    """Totais de usuários, saldos e limites, distribuição por faixa de saldo e
+    por agência, lidos das tabelas de resumo mantidas pelo crud"""
+    return crud.get_stats(db)
@@ -0,0 +1,16 @@
+"""Estatísticas agregadas sobre a pilha assíncrona (DB_MODE=async)"""
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud_async as crud
+from app.database import get_async_read_db
+from app.models import StatsResponse
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+# ========== GET ENDPOINTS ==========
+
+@router.get("", response_model=StatsResponse)
+async def read_stats(db: AsyncSession = Depends(get_async_read_db)):
+    """Totais e distribuições lidos das tabelas de resumo"""
+    return await crud.get_stats(db)
@@ -0,0 +1,43 @@
+"""Transferências em lote (POST /transfers/batch)"""
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.database import get_db
+from app.models import TransferBatchRequest, TransferBatchResponse
+
+router = APIRouter(prefix="/transfers", tags=["transfers"])
+
+def build_batch_response(batch: TransferBatchRequest, results: list, response: Response) -> TransferBatchResponse:
+    """Resumo do lote; lote atomic rejeitado responde 409 com o motivo por item"""
+    applied = sum(1 for result in results if result["status"] == "applied")
+    if batch.mode == "atomic" and applied < len(results):
+        response.status_code = status.HTTP_409_CONFLICT
+    return TransferBatchResponse(
+        mode=batch.mode,
+        applied=applied,
+        failed=len(results) - applied,
+        results=results
+    )
+
+# ========== POST ENDPOINTS ==========
+
+@router.post("/batch", response_model=TransferBatchResponse)
+def transfer_batch(batch: TransferBatchRequest, response: Response, db: Session = Depends(get_db)):
+    """Executa várias transferências de uma vez.
+
+    `atomic` grava tudo em uma transação ou nada (409 se algum item falhar);
+    `best_effort` aplica as transferências válidas e reporta as demais.
+    """
+    try:
+        results = crud.transfer_batch(
+            db,
+            [transfer.model_dump() for transfer in batch.transfers],
+            atomic=batch.mode == "atomic"
+        )
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    return build_batch_response(batch, results, response)
@@ -0,0 +1,28 @@
+"""Rotas de transferências sobre a pilha assíncrona (DB_MODE=async)"""
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud_async as crud
+from app.database import get_async_db
+from app.models import TransferBatchRequest, TransferBatchResponse
+from app.routers.transfers import build_batch_response
+
+router = APIRouter(prefix="/transfers", tags=["transfers"])
+
+# ========== POST ENDPOINTS ==========
+
+@router.post("/batch", response_model=TransferBatchResponse)
+async def transfer_batch(batch: TransferBatchRequest, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """Executa várias transferências de uma vez (atomic ou best_effort)"""
+    try:
+        results = await crud.transfer_batch(
+            db,
+            [transfer.model_dump() for transfer in batch.transfers],
+            atomic=batch.mode == "atomic"
+        )
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    return build_batch_response(batch, results, response)
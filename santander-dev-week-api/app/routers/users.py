@@ -1,56 +1,360 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from typing import List, Optional
-import time
+from typing import List, Optional, Union
+import json
 
 from app import crud
-from app.database import get_db
+from app.cache import user_cache
+from app.database import get_db, get_read_db
+from app.pagination import encode_cursor, decode_cursor
+from app.serialization import (
+    USER_FIELDS, USER_RELATIONS, encode_json, encode_user, encode_user_page, encode_users, json_response
+)
 from app.models import (
-    UserResponse, UserCreate, UserUpdate,
+    UserResponse, UserCreate, UserUpdate, UserPage, TransactionPage, NewsPage,
+    BulkCreateResponse, BulkItemResult,
     DepositRequest, WithdrawRequest, TransferRequest, SimpleUserCreate
 )
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+# ========== PAGINAÇÃO ==========
+
+def decode_user_cursor(after: Optional[str]) -> int:
+    """Converte o cursor `after` no último UserDB.id já retornado"""
+    if not after:
+        return 0
+    try:
+        return int(decode_cursor(after, "id")["id"])
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+def build_user_page(users: list, limit: int, fields=None) -> Response:
+    """Monta a página (UserPage já codificado) a partir de limit + 1 linhas buscadas"""
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(id=users[-1].id)
+    return json_response(encode_user_page(users, next_cursor, fields))
+
+# Máximo de ids por GET /users?ids=
+USER_IDS_MAX = 500
+
+def parse_user_ids(ids: str) -> list:
+    """Ids de `ids=1,2,3` sem repetição, na ordem em que vieram"""
+    try:
+        user_ids = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids deve ser uma lista de inteiros separados por vírgula"
+        )
+    if not user_ids or len(user_ids) > USER_IDS_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ids deve ter de 1 a {USER_IDS_MAX} ids"
+        )
+    return user_ids
+
+def decode_transaction_cursor(after: Optional[str]) -> Optional[int]:
+    """Converte o cursor `after` no último seq do extrato já retornado"""
+    if not after:
+        return None
+    try:
+        return int(decode_cursor(after, "seq")["seq"])
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+def build_transaction_page(entries: list, limit: int) -> TransactionPage:
+    """Monta a página do extrato a partir de limit + 1 lançamentos buscados"""
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        next_cursor = encode_cursor(seq=entries[-1].seq)
+    return TransactionPage(items=entries, next_cursor=next_cursor)
+
+def decode_news_cursor(after: Optional[str]) -> Optional[int]:
+    """Converte o cursor `after` no último vínculo de notícia já retornado"""
+    if not after:
+        return None
+    try:
+        return int(decode_cursor(after, "id")["id"])
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+def build_news_page(rows: list, limit: int) -> Response:
+    """Monta o NewsPage já codificado a partir de limit + 1 vínculos buscados"""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(id=rows[-1].id)
+    return json_response(encode_json({
+        "items": [{"icon": row.icon, "description": row.description} for row in rows],
+        "next_cursor": next_cursor
+    }))
+
+# ========== CAMPOS ESPARSOS ==========
+# fields= escolhe os campos do topo do UserResponse; include= acrescenta
+# relações aos campos escalares (ou aos de fields=, se os dois vierem).
+# Relações fora da seleção não são carregadas (crud.fields_strategy).
+
+FIELDS_DESCRIPTION = f"Campos da resposta, separados por vírgula: {', '.join(USER_FIELDS)}"
+INCLUDE_DESCRIPTION = f"Relações incluídas além dos campos simples: {', '.join(USER_RELATIONS)}"
+
+def _split_names(value: str, allowed: tuple, param: str) -> set:
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = names - set(allowed)
+    if not names or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{param} inválido: use {', '.join(allowed)}"
+        )
+    return names
+
+def parse_user_fields(fields: Optional[str], include: Optional[str]) -> Optional[tuple]:
+    """Campos pedidos, na ordem do UserResponse (None = resposta completa)"""
+    if fields is None and include is None:
+        return None
+    if fields is not None:
+        selected = _split_names(fields, USER_FIELDS, "fields")
+    else:
+        selected = {field for field in USER_FIELDS if field not in USER_RELATIONS}
+    if include is not None:
+        selected |= _split_names(include, USER_RELATIONS, "include")
+    return tuple(field for field in USER_FIELDS if field in selected)
+
+def user_strategy(selected: Optional[tuple], default: str):
+    """Estratégia de carregamento para a seleção de campos"""
+    return default if selected is None else crud.fields_strategy(selected)
+
+# ========== SERIALIZAÇÃO ==========
+# Respostas de usuário saem como bytes prontos (ver app/serialization.py);
+# o response_model das rotas fica só para o OpenAPI.
+
+def serialize_balance(user_id: int, account) -> bytes:
+    return encode_json({
+        "user_id": user_id,
+        "balance": account.balance,
+        "available_limit": account.limit,
+        "total_available": account.balance + account.limit
+    })
+
+# ========== CRIAÇÃO EM LOTE ==========
+
+# Itens por transação no POST /users/bulk
+BULK_CHUNK_SIZE = 500
+
+async def iter_bulk_items(request: Request):
+    """Gera (índice, item bruto) de um JSON array ou de um stream NDJSON.
+
+    No NDJSON as linhas são lidas conforme chegam, sem carregar o corpo inteiro.
+    """
+    if "ndjson" in request.headers.get("content-type", ""):
+        index = 0
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield index, line
+                    index += 1
+        if buffer.strip():
+            yield index, buffer
+        return
+    
+    try:
+        payload = await request.json()
+    except json.JSONDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Corpo deve ser um JSON array ou NDJSON"
+        )
+    if not isinstance(payload, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Corpo deve ser um JSON array ou NDJSON"
+        )
+    for index, item in enumerate(payload):
+        yield index, item
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'item'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+async def run_bulk_create(request: Request, create_chunk) -> BulkCreateResponse:
+    """Valida item a item e grava em transações de BULK_CHUNK_SIZE itens.
+
+    `create_chunk` recebe a lista de payloads e devolve, na mesma ordem, o id
+    criado ou a exceção de cada item (ver crud.create_users_bulk).
+    """
+    results = []
+    chunk = []
+    
+    async def flush():
+        outcomes = await create_chunk([data for _, data in chunk])
+        for (index, _), outcome in zip(chunk, outcomes):
+            if isinstance(outcome, Exception):
+                error = str(getattr(outcome, "orig", None) or outcome)
+                results.append(BulkItemResult(index=index, status="failed", error=error))
+            else:
+                results.append(BulkItemResult(index=index, status="created", id=outcome))
+        chunk.clear()
+    
+    async for index, raw in iter_bulk_items(request):
+        try:
+            if isinstance(raw, bytes):
+                user = UserCreate.model_validate_json(raw)
+            else:
+                user = UserCreate.model_validate(raw)
+        except ValidationError as e:
+            results.append(BulkItemResult(index=index, status="failed", error=_validation_message(e)))
+            continue
+        
+        chunk.append((index, user.model_dump()))
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await flush()
+    
+    if chunk:
+        await flush()
+    
+    results.sort(key=lambda result: result.index)
+    created = sum(1 for result in results if result.status == "created")
+    return BulkCreateResponse(created=created, failed=len(results) - created, results=results)
+
 # ========== GET ENDPOINTS ==========
 
-@router.get("/", response_model=List[UserResponse])
+@router.get("/", response_model=Union[List[UserResponse], UserPage])
 def read_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
-    db: Session = Depends(get_db)
+    pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+    after: Optional[str] = Query(None, description="Cursor retornado em next_cursor"),
+    ids: Optional[str] = Query(None, description=f"Busca em lote: até {USER_IDS_MAX} ids separados por vírgula"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    db: Session = Depends(get_read_db)
 ):
-    """Retorna lista de usuários"""
-    users = crud.get_users(db, skip=skip, limit=limit)
-    return users
+    """Retorna lista de usuários.
 
-@router.get("/{user_id}", response_model=UserResponse)
-def read_user(user_id: int, db: Session = Depends(get_db)):
-    """Retorna usuário pelo ID"""
-    db_user = crud.get_user(db, user_id=user_id)
+    Por padrão usa skip/limit (lista simples). Com `pagination=cursor` ou
+    `after` informado, usa paginação keyset e retorna `{items, next_cursor}`.
+    Com `ids`, retorna esses usuários (na ordem pedida, sem os inexistentes)
+    em uma única query IN, ignorando a paginação.
+    """
+    selected = parse_user_fields(fields, include)
+    strategy = user_strategy(selected, "list")
+    if ids is not None:
+        users = crud.get_users_by_ids(db, parse_user_ids(ids), strategy=strategy)
+        return json_response(encode_users(users, selected))
+    if pagination == "offset" and after is None:
+        users = crud.get_users(db, skip=skip, limit=limit, strategy=strategy)
+        return json_response(encode_users(users, selected))
+    
+    # Busca uma linha extra só para saber se existe próxima página
+    users = crud.get_users_after(db, after_id=decode_user_cursor(after), limit=limit + 1, strategy=strategy)
+    return build_user_page(users, limit, selected)
+
+@router.get("/by-email", response_model=UserResponse)
+def read_user_by_email(
+    email: str = Query(..., min_length=3, max_length=100),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    db: Session = Depends(get_read_db)
+):
+    """Retorna usuário pelo e-mail"""
+    selected = parse_user_fields(fields, include)
+    db_user = crud.get_user_by_email(db, email=email, strategy=user_strategy(selected, "detail"))
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Usuário {user_id} não encontrado"
+            detail=f"Usuário com e-mail {email} não encontrado"
         )
-    return db_user
+    return json_response(encode_user(db_user, selected))
+
+@router.get("/{user_id}", response_model=UserResponse)
+def read_user(
+    user_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    db: Session = Depends(get_read_db)
+):
+    """Retorna usuário pelo ID (read-through no cache só para a resposta completa)"""
+    selected = parse_user_fields(fields, include)
+    payload, version = user_cache.lookup("user", user_id) if selected is None else (None, None)
+    if payload is None:
+        db_user = crud.get_user(db, user_id=user_id, strategy=user_strategy(selected, "detail"))
+        if db_user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Usuário {user_id} não encontrado"
+            )
+        payload = encode_user(db_user, selected)
+        if selected is None:
+            user_cache.store("user", user_id, payload, version)
+    return json_response(payload)
 
 @router.get("/{user_id}/balance")
-def get_user_balance(user_id: int, db: Session = Depends(get_db)):
-    """Retorna saldo do usuário"""
-    db_user = crud.get_user(db, user_id=user_id)
-    if db_user is None:
+def get_user_balance(user_id: int, db: Session = Depends(get_read_db)):
+    """Retorna saldo do usuário (read-through no cache)"""
+    payload, version = user_cache.lookup("balance", user_id)
+    if payload is None:
+        account = crud.get_user_account(db, user_id=user_id)
+        if account is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Usuário {user_id} não encontrado"
+            )
+        payload = serialize_balance(user_id, account)
+        user_cache.store("balance", user_id, payload, version)
+    return json_response(payload)
+
+@router.get("/{user_id}/transactions", response_model=TransactionPage)
+def read_transactions(
+    user_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    after: Optional[str] = Query(None, description="Cursor retornado em next_cursor"),
+    db: Session = Depends(get_read_db)
+):
+    """Retorna o extrato do usuário, do lançamento mais recente para o mais antigo"""
+    before_seq = decode_transaction_cursor(after)
+    entries = crud.get_transactions(db, user_id, before_seq=before_seq, limit=limit + 1)
+    if not entries and before_seq is None and crud.get_user_account(db, user_id=user_id) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Usuário {user_id} não encontrado"
         )
-    
-    return {
-        "user_id": user_id,
-        "balance": db_user.account.balance,
-        "available_limit": db_user.account.limit,
-        "total_available": db_user.account.balance + db_user.account.limit
-    }
+    return build_transaction_page(entries, limit)
+
+@router.get("/{user_id}/news", response_model=NewsPage)
+def read_user_news(
+    user_id: int,
+    limit: int = Query(20, ge=1, le=200),
+    after: Optional[str] = Query(None, description="Cursor retornado em next_cursor"),
+    db: Session = Depends(get_read_db)
+):
+    """Retorna as notícias do usuário, da mais recente para a mais antiga"""
+    before_id = decode_news_cursor(after)
+    rows = crud.get_user_news(db, user_id, before_id=before_id, limit=limit + 1)
+    if not rows and before_id is None and crud.get_user(db, user_id, strategy="minimal") is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Usuário {user_id} não encontrado"
+        )
+    return build_news_page(rows, limit)
 
 # ========== POST ENDPOINTS ==========
 
@@ -58,15 +362,20 @@ def get_user_balance(user_id: int, db: Session = Depends(get_db)):
 def create_user(user: UserCreate, db: Session = Depends(get_db)):
     """Cria novo usuário completo"""
     user_data = user.model_dump()
-    db_user = crud.create_user(db, user_data)
-    return db_user
+    try:
+        db_user = crud.create_user(db, user_data)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    return json_response(encode_user(db_user), status.HTTP_201_CREATED)
 
-@router.post("/simple", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def create_simple_user(user: SimpleUserCreate, db: Session = Depends(get_db)):
-    """Cria usuário simplificado"""
+def build_simple_user_data(user: SimpleUserCreate) -> dict:
+    """Monta o payload completo de um usuário simplificado"""
     import random
     
-    user_data = {
+    return {
         "name": user.name,
         "email": user.email,
         "account": {
@@ -88,9 +397,26 @@ def create_simple_user(user: SimpleUserCreate, db: Session = Depends(get_db)):
             {"icon": "🎉", "description": "Bem-vindo ao Santander Dev Week!"}
         ]
     }
-    
-    db_user = crud.create_user(db, user_data)
-    return db_user
+
+@router.post("/bulk", response_model=BulkCreateResponse)
+async def create_users_bulk(request: Request, db: Session = Depends(get_db)):
+    """Cria usuários em lote a partir de um JSON array de UserCreate ou de
+    NDJSON (Content-Type: application/x-ndjson), com resultado por item"""
+    return await run_bulk_create(
+        request, lambda chunk: run_in_threadpool(crud.create_users_bulk, db, chunk)
+    )
+
+@router.post("/simple", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+def create_simple_user(user: SimpleUserCreate, db: Session = Depends(get_db)):
+    """Cria usuário simplificado"""
+    try:
+        db_user = crud.create_user(db, build_simple_user_data(user))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    return json_response(encode_user(db_user), status.HTTP_201_CREATED)
 
 @router.post("/{user_id}/deposit", status_code=status.HTTP_200_OK)
 def deposit_money(
@@ -99,22 +425,19 @@ def deposit_money(
     db: Session = Depends(get_db)
 ):
     """Realiza depósito"""
-    db_user = crud.get_user(db, user_id=user_id)
-    if db_user is None:
+    entry = crud.deposit_money(db, user_id, deposit.amount)
+    if entry is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Usuário {user_id} não encontrado"
         )
     
-    crud.deposit_money(db, user_id, deposit.amount)
-    db_user = crud.get_user(db, user_id=user_id)
-    
     return {
         "message": "Depósito realizado com sucesso",
         "user_id": user_id,
         "amount": deposit.amount,
-        "new_balance": db_user.account.balance,
-        "transaction_id": f"DEP{int(time.time())}{user_id}"
+        "new_balance": entry.balance_after,
+        "transaction_id": entry.reference
     }
 
 @router.post("/{user_id}/withdraw", status_code=status.HTTP_200_OK)
@@ -124,29 +447,27 @@ def withdraw_money(
     db: Session = Depends(get_db)
 ):
     """Realiza saque"""
-    db_user = crud.get_user(db, user_id=user_id)
-    if db_user is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Usuário {user_id} não encontrado"
-        )
-    
     try:
-        crud.withdraw_money(db, user_id, withdraw.amount)
-        db_user = crud.get_user(db, user_id=user_id)
-        
-        return {
-            "message": "Saque realizado com sucesso",
-            "user_id": user_id,
-            "amount": withdraw.amount,
-            "new_balance": db_user.account.balance,
-            "transaction_id": f"SAQ{int(time.time())}{user_id}"
-        }
+        entry = crud.withdraw_money(db, user_id, withdraw.amount)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Usuário {user_id} não encontrado"
+        )
+    
+    return {
+        "message": "Saque realizado com sucesso",
+        "user_id": user_id,
+        "amount": withdraw.amount,
+        "new_balance": entry.balance_after,
+        "transaction_id": entry.reference
+    }
 
 @router.post("/{user_id}/transfer", status_code=status.HTTP_200_OK)
 def transfer_money(
@@ -165,7 +486,7 @@ def transfer_money(
             "amount": transfer.amount,
             "new_balance_from": result["new_balance_from"],
             "new_balance_to": result["new_balance_to"],
-            "transaction_id": f"TRF{int(time.time())}{user_id}"
+            "transaction_id": result["transaction_id"]
         }
     except ValueError as e:
         raise HTTPException(
@@ -182,13 +503,19 @@ def update_user(
     db: Session = Depends(get_db)
 ):
     """Atualiza usuário"""
-    db_user = crud.update_user(db, user_id, user_update.model_dump(exclude_unset=True))
+    try:
+        db_user = crud.update_user(db, user_id, user_update.model_dump(exclude_unset=True))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Usuário {user_id} não encontrado"
         )
-    return db_user
+    return json_response(encode_user(db_user))
 
 # ========== DELETE ENDPOINTS ==========
 
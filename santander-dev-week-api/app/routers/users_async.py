@@ -0,0 +1,278 @@
+"""Rotas de usuários sobre a pilha assíncrona (DB_MODE=async)"""
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+
+from app import crud_async as crud
+from app.cache import user_cache
+from app.database import get_async_db, get_async_read_db
+from app.serialization import encode_user, encode_users, json_response
+from app.models import (
+    UserResponse, UserCreate, UserUpdate, UserPage, TransactionPage, NewsPage, BulkCreateResponse,
+    DepositRequest, WithdrawRequest, TransferRequest, SimpleUserCreate
+)
+from app.routers.users import (
+    FIELDS_DESCRIPTION, INCLUDE_DESCRIPTION,
+    build_simple_user_data, build_user_page, decode_user_cursor,
+    build_transaction_page, decode_transaction_cursor, build_news_page, decode_news_cursor,
+    USER_IDS_MAX, parse_user_ids, parse_user_fields, user_strategy, run_bulk_create, serialize_balance
+)
+
+router = APIRouter(prefix="/users", tags=["users"])
+
+# ========== GET ENDPOINTS ==========
+
+@router.get("/", response_model=Union[List[UserResponse], UserPage])
+async def read_users(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+    after: Optional[str] = Query(None, description="Cursor retornado em next_cursor"),
+    ids: Optional[str] = Query(None, description=f"Busca em lote: até {USER_IDS_MAX} ids separados por vírgula"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Retorna lista de usuários"""
+    selected = parse_user_fields(fields, include)
+    strategy = user_strategy(selected, "list")
+    if ids is not None:
+        users = await crud.get_users_by_ids(db, parse_user_ids(ids), strategy=strategy)
+        return json_response(encode_users(users, selected))
+    if pagination == "offset" and after is None:
+        users = await crud.get_users(db, skip=skip, limit=limit, strategy=strategy)
+        return json_response(encode_users(users, selected))
+    
+    users = await crud.get_users_after(db, after_id=decode_user_cursor(after), limit=limit + 1, strategy=strategy)
+    return build_user_page(users, limit, selected)
+
+@router.get("/by-email", response_model=UserResponse)
+async def read_user_by_email(
+    email: str = Query(..., min_length=3, max_length=100),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Retorna usuário pelo e-mail"""
+    selected = parse_user_fields(fields, include)
+    db_user = await crud.get_user_by_email(db, email=email, strategy=user_strategy(selected, "detail"))
+    if db_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Usuário com e-mail {email} não encontrado"
+        )
+    return json_response(encode_user(db_user, selected))
+
+@router.get("/{user_id}", response_model=UserResponse)
+async def read_user(
+    user_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Retorna usuário pelo ID (read-through no cache só para a resposta completa)"""
+    selected = parse_user_fields(fields, include)
+    payload, version = user_cache.lookup("user", user_id) if selected is None else (None, None)
+    if payload is None:
+        db_user = await crud.get_user(db, user_id=user_id, strategy=user_strategy(selected, "detail"))
+        if db_user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Usuário {user_id} não encontrado"
+            )
+        payload = encode_user(db_user, selected)
+        if selected is None:
+            user_cache.store("user", user_id, payload, version)
+    return json_response(payload)
+
+@router.get("/{user_id}/balance")
+async def get_user_balance(user_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """Retorna saldo do usuário (read-through no cache)"""
+    payload, version = user_cache.lookup("balance", user_id)
+    if payload is None:
+        account = await crud.get_user_account(db, user_id=user_id)
+        if account is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Usuário {user_id} não encontrado"
+            )
+        payload = serialize_balance(user_id, account)
+        user_cache.store("balance", user_id, payload, version)
+    return json_response(payload)
+
+@router.get("/{user_id}/transactions", response_model=TransactionPage)
+async def read_transactions(
+    user_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    after: Optional[str] = Query(None, description="Cursor retornado em next_cursor"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Retorna o extrato do usuário, do lançamento mais recente para o mais antigo"""
+    before_seq = decode_transaction_cursor(after)
+    entries = await crud.get_transactions(db, user_id, before_seq=before_seq, limit=limit + 1)
+    if not entries and before_seq is None and await crud.get_user_account(db, user_id=user_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Usuário {user_id} não encontrado"
+        )
+    return build_transaction_page(entries, limit)
+
+@router.get("/{user_id}/news", response_model=NewsPage)
+async def read_user_news(
+    user_id: int,
+    limit: int = Query(20, ge=1, le=200),
+    after: Optional[str] = Query(None, description="Cursor retornado em next_cursor"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Retorna as notícias do usuário, da mais recente para a mais antiga"""
+    before_id = decode_news_cursor(after)
+    rows = await crud.get_user_news(db, user_id, before_id=before_id, limit=limit + 1)
+    if not rows and before_id is None and await crud.get_user(db, user_id, strategy="minimal") is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Usuário {user_id} não encontrado"
+        )
+    return build_news_page(rows, limit)
+
+# ========== POST ENDPOINTS ==========
+
+@router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    """Cria novo usuário completo"""
+    try:
+        db_user = await crud.create_user(db, user.model_dump())
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    return json_response(encode_user(db_user), status.HTTP_201_CREATED)
+
+@router.post("/bulk", response_model=BulkCreateResponse)
+async def create_users_bulk(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Cria usuários em lote (JSON array ou NDJSON), com resultado por item"""
+    return await run_bulk_create(request, lambda chunk: crud.create_users_bulk(db, chunk))
+
+@router.post("/simple", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+async def create_simple_user(user: SimpleUserCreate, db: AsyncSession = Depends(get_async_db)):
+    """Cria usuário simplificado"""
+    try:
+        db_user = await crud.create_user(db, build_simple_user_data(user))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    return json_response(encode_user(db_user), status.HTTP_201_CREATED)
+
+@router.post("/{user_id}/deposit", status_code=status.HTTP_200_OK)
+async def deposit_money(
+    user_id: int,
+    deposit: DepositRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Realiza depósito"""
+    entry = await crud.deposit_money(db, user_id, deposit.amount)
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Usuário {user_id} não encontrado"
+        )
+    
+    return {
+        "message": "Depósito realizado com sucesso",
+        "user_id": user_id,
+        "amount": deposit.amount,
+        "new_balance": entry.balance_after,
+        "transaction_id": entry.reference
+    }
+
+@router.post("/{user_id}/withdraw", status_code=status.HTTP_200_OK)
+async def withdraw_money(
+    user_id: int,
+    withdraw: WithdrawRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Realiza saque"""
+    try:
+        entry = await crud.withdraw_money(db, user_id, withdraw.amount)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Usuário {user_id} não encontrado"
+        )
+    
+    return {
+        "message": "Saque realizado com sucesso",
+        "user_id": user_id,
+        "amount": withdraw.amount,
+        "new_balance": entry.balance_after,
+        "transaction_id": entry.reference
+    }
+
+@router.post("/{user_id}/transfer", status_code=status.HTTP_200_OK)
+async def transfer_money(
+    user_id: int,
+    transfer: TransferRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Realiza transferência"""
+    try:
+        result = await crud.transfer_money(db, user_id, transfer.to_user_id, transfer.amount)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return {
+        "message": "Transferência realizada com sucesso",
+        "from_user_id": user_id,
+        "to_user_id": transfer.to_user_id,
+        "amount": transfer.amount,
+        "new_balance_from": result["new_balance_from"],
+        "new_balance_to": result["new_balance_to"],
+        "transaction_id": result["transaction_id"]
+    }
+
+# ========== PUT ENDPOINTS ==========
+
+@router.put("/{user_id}", response_model=UserResponse)
+async def update_user(
+    user_id: int,
+    user_update: UserUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Atualiza usuário"""
+    try:
+        db_user = await crud.update_user(db, user_id, user_update.model_dump(exclude_unset=True))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    if db_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Usuário {user_id} não encontrado"
+        )
+    return json_response(encode_user(db_user))
+
+# ========== DELETE ENDPOINTS ==========
+
+@router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Remove usuário"""
+    success = await crud.delete_user(db, user_id)
+    if not success:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Usuário {user_id} não encontrado"
+        )
+    return None
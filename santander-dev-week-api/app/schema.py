@@ -0,0 +1,117 @@
+"""
+Versão do esquema do banco (Alembic).
+
+A API não cria mais tabelas com `create_all` a cada boot: no startup ela
+confere se o banco está na revisão `head` das migrações. Com
+DB_AUTO_MIGRATE=true (padrão no perfil dev) aplica as migrações pendentes.
+
+O Alembic (~0,2 s de import) só é importado dentro das funções que o usam;
+`stamped_revision` lê a revisão com SQL puro para o boot rápido e a compara
+com HEAD_REVISION.
+"""
+import os
+from pathlib import Path
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError
+
+from app.database import DB_PROFILE
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+DB_AUTO_MIGRATE = os.getenv(
+    "DB_AUTO_MIGRATE", "true" if DB_PROFILE == "dev" else "false"
+).lower() in ("1", "true", "yes")
+
+# Última revisão em migrations/versions: o boot rápido compara com ela sem
+# carregar o ScriptDirectory. Atualize junto com cada nova migração
+# (tests/test_schema.py confere)
+HEAD_REVISION = "0006"
+
+# Bancos criados antes das migrações (create_all): revisão equivalente,
+# identificada pela tabela mais recente que já existe
+LEGACY_REVISIONS = (
+    ("transactions", "0002"),
+    ("users", "0001"),
+)
+
+
+def alembic_config(connection=None):
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def head_revision() -> str:
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def current_revision(engine):
+    from alembic.runtime.migration import MigrationContext
+
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def stamped_revision(engine) -> str:
+    """Revisão gravada em alembic_version, sem importar o Alembic.
+
+    Levanta RuntimeError se o banco nunca foi migrado ou não está em
+    HEAD_REVISION: a migração é do passo de deploy (`python -m app.seed --migrate`).
+    """
+    try:
+        with engine.connect() as connection:
+            revision = connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except OperationalError:
+        revision = None
+    if revision is None:
+        raise RuntimeError(
+            "Banco sem migrações aplicadas. Rode `python -m app.seed --migrate` "
+            "(ou `alembic upgrade head`) antes de subir a API."
+        )
+    if revision != HEAD_REVISION:
+        raise RuntimeError(
+            f"Esquema do banco na revisão {revision}, esperado {HEAD_REVISION}. "
+            "Rode `python -m app.seed --migrate` (ou `alembic upgrade head`)."
+        )
+    return revision
+
+
+def upgrade_to_head(engine):
+    """Aplica as migrações pendentes, adotando bancos pré-Alembic"""
+    from alembic import command
+    from alembic.runtime.migration import MigrationContext
+
+    with engine.begin() as connection:
+        config = alembic_config(connection)
+        if MigrationContext.configure(connection).get_current_revision() is None:
+            tables = set(inspect(connection).get_table_names())
+            for table, revision in LEGACY_REVISIONS:
+                if table in tables:
+                    command.stamp(config, revision)
+                    break
+        command.upgrade(config, "head")
+
+
+def verify_schema(engine):
+    """Levanta RuntimeError se o banco não estiver na revisão head"""
+    current, head = current_revision(engine), head_revision()
+    if current != head:
+        raise RuntimeError(
+            f"Esquema do banco na revisão {current or 'nenhuma'}, esperado {head}. "
+            "Rode `alembic upgrade head` (ou DB_AUTO_MIGRATE=true)."
+        )
+
+
+def ensure_schema(engine) -> str:
+    """Migra (se DB_AUTO_MIGRATE) e confere a revisão; retorna a revisão atual"""
+    if DB_AUTO_MIGRATE:
+        upgrade_to_head(engine)
+    verify_schema(engine)
+    return head_revision()
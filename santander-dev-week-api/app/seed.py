@@ -0,0 +1,51 @@
+"""
+Migração e seed fora do boot da API.
+
+No modo FAST_BOOT a API não migra nem popula o banco ao subir; rode este
+comando uma vez por deploy (é idempotente):
+
+    python -m app.seed --migrate
+"""
+import argparse
+
+from app import crud
+from app.database import SessionLocal, engine
+from app.schema import head_revision, upgrade_to_head
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aplica migrações e popula os dados iniciais")
+    parser.add_argument("--migrate", action="store_true", help="aplica as migrações pendentes antes do seed")
+    parser.add_argument("--no-seed", action="store_true", help="só migra, sem popular usuários")
+    parser.add_argument("--rebuild-stats", action="store_true",
+                        help="recalcula as tabelas de resumo do GET /stats a partir das contas")
+    args = parser.parse_args()
+
+    if args.migrate:
+        upgrade_to_head(engine)
+        print(f"✅ Esquema do banco na revisão {head_revision()}")
+
+    if args.rebuild_stats:
+        db = SessionLocal()
+        try:
+            crud.rebuild_stats(db)
+        finally:
+            db.close()
+        print("📊 Estatísticas recalculadas")
+
+    if args.no_seed:
+        return
+
+    db = SessionLocal()
+    try:
+        created = crud.seed_initial_data(db)
+    finally:
+        db.close()
+    if created:
+        print(f"🌱 {created} usuários iniciais criados")
+    else:
+        print("✅ Banco já populado, nada a fazer")
+
+
+if __name__ == "__main__":
+    main()
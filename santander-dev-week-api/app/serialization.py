@@ -0,0 +1,137 @@
+"""
+Serialização rápida das respostas de usuário.
+
+O caminho padrão do FastAPI valida o grafo ORM em `UserResponse`
+(from_attributes), converte para tipos JSON e só então codifica com
+`json.dumps`. Para páginas de até 500 usuários esse custo domina a CPU.
+
+Aqui há dois modos (variável SERIALIZATION):
+- `orjson` (padrão): percorre as colunas do ORM direto para dicts e codifica
+  com orjson, sem validação pydantic. Os dados vêm do banco com os tipos das
+  colunas, então a validação de saída seria redundante.
+- `pydantic`: `TypeAdapter`s pré-compilados que validam e geram o JSON em
+  uma passada (útil para conferir o formato ou se o orjson não estiver
+  disponível).
+
+Com `fields=`/`include=` (campos esparsos) só os campos pedidos são montados
+e codificados com encode_json, nos dois modos: o objeto ORM não tem as
+relações não pedidas carregadas, então não dá para validá-lo como UserResponse.
+
+As rotas devolvem `Response` com os bytes prontos, o que faz o FastAPI pular
+a revalidação do `response_model` (mantido apenas para o OpenAPI). Os dois
+modos produzem o mesmo JSON byte a byte (ver benchmarks/serialization.py).
+"""
+import json
+import os
+from typing import List
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app.models import UserPage, UserResponse
+
+SERIALIZATION_MODE = os.getenv("SERIALIZATION", "orjson").lower()
+
+JSON_MEDIA_TYPE = "application/json"
+
+if SERIALIZATION_MODE == "orjson":
+    try:
+        import orjson
+    except ImportError:
+        raise RuntimeError("SERIALIZATION=orjson exige o pacote 'orjson' (pip install orjson)")
+elif SERIALIZATION_MODE != "pydantic":
+    raise RuntimeError(f"SERIALIZATION inválido: {SERIALIZATION_MODE!r} (use orjson ou pydantic)")
+
+# Campos do topo do UserResponse, na ordem da resposta
+USER_FIELDS = tuple(UserResponse.model_fields)
+USER_RELATIONS = ("account", "card", "features", "news")
+
+# Compilados uma vez na importação, não a cada requisição
+USER_ADAPTER = TypeAdapter(UserResponse)
+USER_LIST_ADAPTER = TypeAdapter(List[UserResponse])
+USER_PAGE_ADAPTER = TypeAdapter(UserPage)
+
+# ========== ORM -> DICT ==========
+
+def _icon_item(item) -> dict:
+    return {"icon": item.icon, "description": item.description}
+
+def _account_dict(account):
+    return None if account is None else {
+        "number": account.number,
+        "agency": account.agency,
+        "balance": float(account.balance),
+        "limit": float(account.limit),
+    }
+
+def _card_dict(card):
+    return None if card is None else {
+        "number": card.number,
+        "limit": float(card.limit),
+    }
+
+_FIELD_GETTERS = {
+    "name": lambda db_user: db_user.name,
+    "email": lambda db_user: db_user.email,
+    "id": lambda db_user: db_user.id,
+    "created_at": lambda db_user: db_user.created_at,
+    "account": lambda db_user: _account_dict(db_user.account),
+    "card": lambda db_user: _card_dict(db_user.card),
+    "features": lambda db_user: [_icon_item(feature) for feature in db_user.features],
+    "news": lambda db_user: [_icon_item(news) for news in db_user.news],
+}
+
+def user_to_dict(db_user, fields=None) -> dict:
+    """Dict no formato do UserResponse lido direto das colunas carregadas.
+
+    Com `fields`, só esses campos (e só as relações entre eles são acessadas).
+    """
+    if fields is not None:
+        return {field: _FIELD_GETTERS[field](db_user) for field in fields}
+    return {
+        "name": db_user.name,
+        "email": db_user.email,
+        "id": db_user.id,
+        "created_at": db_user.created_at,
+        "account": _account_dict(db_user.account),
+        "card": _card_dict(db_user.card),
+        "features": [_icon_item(feature) for feature in db_user.features],
+        "news": [_icon_item(news) for news in db_user.news],
+    }
+
+# ========== CODIFICAÇÃO ==========
+
+def encode_user(db_user, fields=None) -> bytes:
+    """Bytes JSON de um UserResponse (formato guardado no cache)"""
+    if fields is not None:
+        return encode_json(user_to_dict(db_user, fields))
+    if SERIALIZATION_MODE == "orjson":
+        return orjson.dumps(user_to_dict(db_user))
+    return USER_ADAPTER.dump_json(USER_ADAPTER.validate_python(db_user, from_attributes=True))
+
+def encode_users(users: list, fields=None) -> bytes:
+    """Bytes JSON de uma lista de UserResponse"""
+    if fields is not None:
+        return encode_json([user_to_dict(db_user, fields) for db_user in users])
+    if SERIALIZATION_MODE == "orjson":
+        return orjson.dumps([user_to_dict(db_user) for db_user in users])
+    return USER_LIST_ADAPTER.dump_json(USER_LIST_ADAPTER.validate_python(users, from_attributes=True))
+
+def encode_user_page(users: list, next_cursor, fields=None) -> bytes:
+    """Bytes JSON de um UserPage"""
+    if fields is not None:
+        return encode_json({"items": [user_to_dict(db_user, fields) for db_user in users], "next_cursor": next_cursor})
+    if SERIALIZATION_MODE == "orjson":
+        return orjson.dumps({"items": [user_to_dict(db_user) for db_user in users], "next_cursor": next_cursor})
+    page = USER_PAGE_ADAPTER.validate_python({"items": users, "next_cursor": next_cursor}, from_attributes=True)
+    return USER_PAGE_ADAPTER.dump_json(page)
+
+def encode_json(content) -> bytes:
+    """Bytes JSON de dicts/listas simples (saldo, resultados de operações)"""
+    if SERIALIZATION_MODE == "orjson":
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+def json_response(payload: bytes, status_code: int = 200) -> Response:
+    """Response com bytes já codificados (sem passar pelo response_model)"""
+    return Response(content=payload, status_code=status_code, media_type=JSON_MEDIA_TYPE)
@@ -0,0 +1 @@
+# Benchmarks e verificações de desempenho da API
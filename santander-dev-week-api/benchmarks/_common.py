@@ -0,0 +1,175 @@
+"""Utilitários compartilhados pelos benchmarks"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+
+def use_temp_database(name: str = "bench.db") -> str:
+    """Aponta DATABASE_URL para um SQLite temporário.
+
+    Precisa ser chamado antes de importar qualquer módulo de `app`,
+    pois o engine é criado na importação de `app.database`.
+    """
+    tmp_dir = tempfile.mkdtemp(prefix="sdw-bench-")
+    url = f"sqlite:///{os.path.join(tmp_dir, name)}"
+    os.environ["DATABASE_URL"] = url
+    return url
+
+
+def make_user_data(i: int) -> dict:
+    """Usuário sintético com o mesmo formato do seed inicial"""
+    return {
+        "name": f"Cliente {i}",
+        "email": f"cliente{i}@santander.com",
+        "account": {
+            "number": f"{i:08d}-0",
+            "agency": f"{2000 + i % 50}",
+            "balance": 1000.0,
+            "limit": 1000.0,
+        },
+        "card": {
+            "number": f"**** **** **** {i % 10000:04d}",
+            "limit": 2000.0,
+        },
+        "features": [
+            {"icon": "💰", "description": "Pix"},
+            {"icon": "💸", "description": "Transferência"},
+            {"icon": "🛒", "description": "Pagamentos"},
+        ],
+        "news": [
+            {"icon": "🎉", "description": f"Bem-vindo, Cliente {i}!"},
+        ],
+    }
+
+
+def setup_database(n_users: int):
+    """Aplica as migrações e popula `n_users` usuários sintéticos"""
+    from app import crud
+    from app.database import SessionLocal, engine, read_engine
+    from app.schema import upgrade_to_head
+
+    engine.echo = read_engine.echo = False
+    upgrade_to_head(engine)
+
+    db = SessionLocal()
+    try:
+        for start in range(1, n_users + 1, 500):
+            chunk = [make_user_data(i) for i in range(start, min(start + 500, n_users + 1))]
+            crud.create_users_bulk(db, chunk)
+    finally:
+        db.close()
+
+
+@contextmanager
+def count_statements(*engines):
+    """Conta os statements SQL executados nos engines dentro do bloco"""
+    counter = {"count": 0}
+    engines = set(engines)
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter["count"] += 1
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+def percentile(samples: list, pct: float) -> float:
+    """Percentil por posição (nearest-rank) de uma lista de amostras"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+@contextmanager
+def run_server(port: int, env: dict = None):
+    """Sobe `uvicorn app.main:app` em um subprocesso e espera o /health.
+
+    Usa o perfil de engine `bench` (sem echo de SQL) salvo se `env` disser outro.
+    """
+    import subprocess
+    import sys
+    import time
+
+    import httpx
+
+    server_env = {**os.environ, "DB_PROFILE": "bench", **(env or {})}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=server_env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline or process.poll() is not None:
+                raise RuntimeError(f"uvicorn não subiu na porta {port}")
+            time.sleep(0.1)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+async def drive_load(client, requests: list, concurrency: int, duration: float) -> dict:
+    """Dispara `requests` ((método, caminho, json)) com N workers.
+
+    Uma lista é percorrida em round-robin; um iterador/gerador é consumido
+    como vier (útil para corpos únicos por requisição). Retorna req/s,
+    latências (ms) agregadas e os erros: toda resposta fora de 2xx e toda
+    exceção de transporte, com os 4xx também contados à parte (um seed mal
+    configurado dá 404/409 em tudo, não 5xx).
+    """
+    import asyncio
+    import itertools
+    import time
+
+    latencies = []
+    errors = 0
+    client_errors = 0
+    cycle = itertools.cycle(requests) if isinstance(requests, (list, tuple)) else iter(requests)
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors, client_errors
+        while time.perf_counter() < deadline:
+            method, path, body = next(cycle)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                if not response.is_success:
+                    errors += 1
+                    if response.is_client_error:
+                        client_errors += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "client_errors": client_errors,
+        "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
@@ -0,0 +1,54 @@
+"""
+Compara a pilha síncrona (threadpool + SessionLocal) com a assíncrona
+(AsyncSession + aiosqlite) sob alta concorrência.
+
+Sobe um uvicorn por modo sobre o mesmo banco e mede req/s e p99 de um mix
+de leituras (detalhe, saldo e listagem) e depósitos.
+
+Uso (a partir de santander-dev-week-api/):
+    python -m benchmarks.async_vs_sync [--users 200] [--concurrency 200] [--duration 10]
+"""
+import argparse
+import asyncio
+import json
+
+from benchmarks._common import drive_load, run_server, setup_database, use_temp_database
+
+
+def build_requests(n_users: int) -> list:
+    requests = []
+    for user_id in range(1, n_users + 1):
+        requests.append(("GET", f"/users/{user_id}", None))
+        requests.append(("GET", f"/users/{user_id}/balance", None))
+        if user_id % 10 == 0:
+            requests.append(("GET", "/users/?limit=20", None))
+            requests.append(("POST", f"/users/{user_id}/deposit", {"amount": 1.0}))
+    return requests
+
+
+async def bench_mode(mode: str, port: int, args) -> dict:
+    import httpx
+
+    with run_server(port, env={"DB_MODE": mode}) as base_url:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            return await drive_load(client, build_requests(args.users), args.concurrency, args.duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    use_temp_database()
+    setup_database(args.users)
+
+    results = {mode: asyncio.run(bench_mode(mode, args.port, args)) for mode in ("sync", "async")}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Stress de concorrência das operações de saldo.
+
+Roda depósitos e transferências aleatórias em várias threads, cada uma com
+sua própria sessão, e compara:
+  - legacy: lê a conta, altera o saldo em Python e faz commit
+  - guarded: só o UPDATE guardado (saldo + limite no WHERE), sem extrato
+    nem estatísticas; faz o mesmo trabalho do legacy, então é a comparação
+    justa de vazão
+  - atomic: crud.deposit_money / crud.transfer_money, o caminho real da API:
+    UPDATE guardado + lançamento no extrato + contadores do /stats na mesma
+    transação
+
+No final confere a conservação do dinheiro: saldo total esperado =
+saldo inicial + soma dos depósitos confirmados. Para o atomic, confere
+também se cada saldo bate com o reconstruído pelo extrato.
+
+O legacy perde dinheiro (atualizações concorrentes se sobrescrevem); o
+guarded não perde e tem vazão igual ou maior (menos statements por
+operação). O atomic é bem mais lento que os dois: cada operação também lê
+o último seq, insere no extrato e soma nas tabelas de estatística. É o
+custo de ter extrato e /stats consistentes, não do UPDATE guardado; a
+variação de vazão de cada um sobre o legacy sai no final da saída.
+
+Uso (a partir de santander-dev-week-api/):
+    python -m benchmarks.balance_concurrency [--users 20] [--threads 16] [--ops 200]
+"""
+import argparse
+import json
+import random
+import threading
+import time
+
+from benchmarks._common import setup_database, use_temp_database
+
+
+def legacy_deposit(db, user_id, amount):
+    from app.models import AccountDB
+
+    account = db.query(AccountDB).filter(AccountDB.user_id == user_id).first()
+    account.balance += amount
+    db.commit()
+
+
+def legacy_transfer(db, from_user_id, to_user_id, amount):
+    from app.models import AccountDB
+
+    from_account = db.query(AccountDB).filter(AccountDB.user_id == from_user_id).first()
+    to_account = db.query(AccountDB).filter(AccountDB.user_id == to_user_id).first()
+    if amount > from_account.balance + from_account.limit:
+        raise ValueError("Saldo insuficiente para transferência")
+    from_account.balance -= amount
+    to_account.balance += amount
+    db.commit()
+
+
+def guarded_deposit(db, user_id, amount):
+    from sqlalchemy import update
+
+    from app.models import AccountDB
+
+    db.execute(
+        update(AccountDB)
+        .where(AccountDB.user_id == user_id)
+        .values(balance=AccountDB.balance + amount)
+    )
+    db.commit()
+
+
+def guarded_transfer(db, from_user_id, to_user_id, amount):
+    from sqlalchemy import update
+
+    from app.models import AccountDB
+
+    # Mesma ordem de lock do crud (menor user_id primeiro)
+    for user_id in sorted((from_user_id, to_user_id)):
+        if user_id == from_user_id:
+            stmt = (
+                update(AccountDB)
+                .where(AccountDB.user_id == user_id, AccountDB.balance + AccountDB.limit >= amount)
+                .values(balance=AccountDB.balance - amount)
+            )
+        else:
+            stmt = update(AccountDB).where(AccountDB.user_id == user_id).values(balance=AccountDB.balance + amount)
+        if db.execute(stmt).rowcount != 1:
+            raise ValueError("Saldo insuficiente para transferência")
+    db.commit()
+
+
+def total_balance() -> float:
+    from sqlalchemy import func
+
+    from app.database import SessionLocal
+    from app.models import AccountDB
+
+    db = SessionLocal()
+    try:
+        return db.query(func.sum(AccountDB.balance)).scalar()
+    finally:
+        db.close()
+
+
+def ledger_mismatches() -> int:
+    """Contas cujo saldo difere do reconstruído pelo extrato"""
+    from app import crud
+    from app.database import SessionLocal
+    from app.models import AccountDB
+
+    db = SessionLocal()
+    try:
+        return sum(
+            1 for account in db.query(AccountDB).all()
+            if abs(crud.rebuild_balance(db, account.id) - account.balance) > 1e-6
+        )
+    finally:
+        db.close()
+
+
+def run_strategy(name, deposit, transfer, args) -> dict:
+    from app.database import SessionLocal
+
+    deposited = 0.0
+    errors = 0
+    lock = threading.Lock()
+    initial = total_balance()
+
+    def worker(seed):
+        nonlocal deposited, errors
+        rng = random.Random(seed)
+        db = SessionLocal()
+        try:
+            for _ in range(args.ops):
+                a, b = rng.sample(range(1, args.users + 1), 2)
+                try:
+                    if rng.random() < 0.5:
+                        deposit(db, a, 1.0)
+                        with lock:
+                            deposited += 1.0
+                    else:
+                        transfer(db, a, b, 1.0)
+                except Exception:
+                    db.rollback()
+                    with lock:
+                        errors += 1
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    expected = initial + deposited
+    final = total_balance()
+    return {
+        "strategy": name,
+        "ops": args.threads * args.ops,
+        "errors": errors,
+        "ops_per_sec": round(args.threads * args.ops / elapsed, 1),
+        "expected_total": round(expected, 2),
+        "final_total": round(final, 2),
+        "lost_money": round(expected - final, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=200, help="operações por thread")
+    args = parser.parse_args()
+
+    use_temp_database()
+    setup_database(args.users)
+
+    from app import crud
+
+    # atomic primeiro: guarded e legacy não gravam extrato e invalidariam a conferência
+    atomic = run_strategy("atomic", crud.deposit_money, crud.transfer_money, args)
+    atomic["ledger_mismatches"] = ledger_mismatches()
+    results = [
+        atomic,
+        run_strategy("guarded", guarded_deposit, guarded_transfer, args),
+        run_strategy("legacy", legacy_deposit, legacy_transfer, args),
+    ]
+    legacy = results[-1]["ops_per_sec"]
+    for result in results[:-1]:
+        result["vs_legacy"] = f"{(result['ops_per_sec'] / legacy - 1) * 100:+.0f}%"
+    print(json.dumps(results, indent=2))
+    print(
+        f"guarded x legacy (mesmo trabalho): {results[1]['vs_legacy']} de vazão, "
+        f"R$ {results[1]['lost_money']:.2f} x R$ {results[2]['lost_money']:.2f} perdidos"
+    )
+    print(
+        f"atomic x legacy: {atomic['vs_legacy']} de vazão; o atomic também grava "
+        "extrato e estatísticas na mesma transação"
+    )
+
+
+if __name__ == "__main__":
+    main()
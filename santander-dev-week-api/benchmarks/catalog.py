@@ -0,0 +1,128 @@
+"""
+Espaço em disco e custo de leitura de features/news com o catálogo
+compartilhado (0005) versus uma cópia por usuário (0004).
+
+Popula o banco na revisão atual, mede, volta para 0004 com o downgrade da
+0005 (que refaz as cópias por usuário a partir dos vínculos) e mede de novo:
+
+- bytes por tabela (dbstat, já com os índices) depois de VACUUM;
+- carga das coleções de uma página de GET /users: as duas queries SELECT IN
+  de features e news que a estratégia "list" emite em cada esquema.
+
+Uso (a partir de santander-dev-week-api/):
+    python -m benchmarks.catalog [--users 20000] [--page 100] [--rounds 20]
+"""
+import argparse
+import json
+import time
+
+from sqlalchemy import text
+
+from benchmarks._common import make_user_data, use_temp_database
+
+# Comunicado enviado a todos, como o do POST /users/simple
+BROADCAST_NEWS = [{"icon": "🎉", "description": "Bem-vindo ao Santander Dev Week!"}]
+
+# As queries que o selectinload emitia (0004) e emite (0005) por página
+CHILD_QUERIES = {
+    "0004": [
+        "SELECT features.user_id, features.id, features.icon, features.description "
+        "FROM features WHERE features.user_id IN ({ids})",
+        "SELECT news.user_id, news.id, news.icon, news.description "
+        "FROM news WHERE news.user_id IN ({ids})",
+    ],
+    "0005": [
+        "SELECT user_features.user_id, features.id, features.icon, features.description "
+        "FROM user_features JOIN features ON features.id = user_features.feature_id "
+        "WHERE user_features.user_id IN ({ids}) ORDER BY user_features.id",
+        "SELECT user_news.user_id, news.id, news.icon, news.description "
+        "FROM user_news JOIN news ON news.id = user_news.news_id "
+        "WHERE user_news.user_id IN ({ids}) ORDER BY user_news.id",
+    ],
+}
+TABLES = ("features", "news", "user_features", "user_news")
+
+
+def populate(n_users: int):
+    from app import crud
+    from app.database import SessionLocal, engine, read_engine
+    from app.schema import upgrade_to_head
+
+    engine.echo = read_engine.echo = False
+    upgrade_to_head(engine)
+    db = SessionLocal()
+    try:
+        for start in range(1, n_users + 1, 500):
+            crud.create_users_bulk(db, [
+                {**make_user_data(i), "news": BROADCAST_NEWS}
+                for i in range(start, min(start + 500, n_users + 1))
+            ])
+    finally:
+        db.close()
+
+
+def measure(engine, revision: str, args) -> dict:
+    with engine.connect() as conn:
+        conn.exec_driver_sql("VACUUM")
+        tables = dict(conn.execute(text(
+            "SELECT m.tbl_name, SUM(d.pgsize) FROM dbstat AS d "
+            "JOIN sqlite_master AS m ON m.name = d.name GROUP BY m.tbl_name"
+        )).all())
+        rows = {
+            table: conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+            for table in TABLES if table in tables
+        }
+        file_bytes = conn.exec_driver_sql("PRAGMA page_count").scalar() * conn.exec_driver_sql("PRAGMA page_size").scalar()
+
+        pages = [
+            ", ".join(str(user_id) for user_id in range(start, start + args.page))
+            for start in range(1, args.users - args.page + 2, max(args.page, args.users // args.rounds))
+        ]
+        queries = [text(sql.format(ids=ids)) for ids in pages for sql in CHILD_QUERIES[revision]]
+        for query in queries:
+            conn.execute(query).all()
+        start = time.perf_counter()
+        for query in queries:
+            conn.execute(query).all()
+        elapsed = time.perf_counter() - start
+
+    return {
+        "file_bytes": file_bytes,
+        "catalog_bytes": sum(tables.get(table, 0) for table in TABLES),
+        "rows": rows,
+        "children_ms_per_page": round(elapsed / len(pages) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    use_temp_database()
+    populate(args.users)
+
+    from alembic import command
+
+    from app.database import engine
+    from app.schema import alembic_config
+
+    results = {"0005": measure(engine, "0005", args)}
+    with engine.begin() as conn:
+        command.downgrade(alembic_config(conn), "0004")
+    results["0004"] = measure(engine, "0004", args)
+
+    before, after = results["0004"], results["0005"]
+    print(json.dumps({
+        "users": args.users,
+        "results": results,
+        "file_bytes_saved_pct": round((1 - after["file_bytes"] / before["file_bytes"]) * 100, 1),
+        "catalog_bytes_saved_pct": round((1 - after["catalog_bytes"] / before["catalog_bytes"]) * 100, 1),
+        "children_speedup": round(before["children_ms_per_page"] / after["children_ms_per_page"], 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Efeito dos perfis de engine (DB_PROFILE) na vazão de leitura e escrita.
+
+Para cada perfil cria um banco SQLite novo, popula, e roda N threads fazendo
+leituras de saldo e depois depósitos, cada thread com sua própria sessão.
+
+Uso (a partir de santander-dev-week-api/):
+    python -m benchmarks.engine_profiles [--users 500] [--threads 8] [--ops 300]
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks._common import make_user_data, use_temp_database
+
+
+def run_threads(session_factory, args, operation) -> float:
+    def worker(offset):
+        db = session_factory()
+        try:
+            for i in range(args.ops):
+                operation(db, (offset * 7919 + i) % args.users + 1)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return round(args.threads * args.ops / (time.perf_counter() - start), 1)
+
+
+def bench_profile(profile: str, args) -> dict:
+    from sqlalchemy.orm import sessionmaker
+
+    from app import crud
+    from app.database import create_profiled_engine, describe_engine
+    from app.schema import upgrade_to_head
+
+    path = os.path.join(tempfile.mkdtemp(prefix="sdw-profile-"), "bench.db")
+    engine = create_profiled_engine(f"sqlite:///{path}", profile=profile)
+    engine.echo = False  # o custo do log não interessa aqui, só os PRAGMAs/pool
+    upgrade_to_head(engine)
+    session_factory = sessionmaker(autoflush=False, bind=engine)
+
+    db = session_factory()
+    try:
+        crud.create_users_bulk(db, [make_user_data(i) for i in range(1, args.users + 1)])
+    finally:
+        db.close()
+
+    settings = describe_engine(engine)
+    settings["profile"] = profile
+    result = {
+        "settings": settings,
+        "reads_per_sec": run_threads(session_factory, args, crud.get_user_account),
+        "writes_per_sec": run_threads(
+            session_factory, args, lambda db, user_id: crud.deposit_money(db, user_id, 1.0)
+        ),
+    }
+    engine.dispose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=300, help="operações por thread")
+    parser.add_argument("--profiles", default="dev,prod,bench")
+    args = parser.parse_args()
+
+    use_temp_database()
+    results = {profile: bench_profile(profile, args) for profile in args.profiles.split(",")}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
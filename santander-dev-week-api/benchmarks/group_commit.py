@@ -0,0 +1,89 @@
+"""
+Vazão de depósitos com e sem group commit.
+
+N threads disparam depósitos ao mesmo tempo. Sem fila, cada depósito faz
+seu próprio commit; com a fila, a thread escritora junta as operações em
+lotes de até `max_batch` e faz um commit por lote.
+
+Uso (a partir de santander-dev-week-api/):
+    python -m benchmarks.group_commit [--threads 32] [--ops 100] [--batch-sizes 1,8,32,128]
+"""
+import argparse
+import json
+import threading
+import time
+
+from benchmarks._common import setup_database, use_temp_database
+
+
+def run(args, write_queue=None) -> dict:
+    from app import crud
+    from app.database import SessionLocal
+
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(offset):
+        nonlocal errors
+        db = SessionLocal()
+        try:
+            for i in range(args.ops):
+                user_id = (offset + i) % args.users + 1
+                try:
+                    if write_queue is not None:
+                        write_queue.submit(crud._apply_deposit, user_id, 1.0).result()
+                    else:
+                        crud.deposit_money(db, user_id, 1.0)
+                except Exception:
+                    with lock:
+                        errors += 1
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total = args.threads * args.ops
+    result = {"ops": total, "errors": errors, "ops_per_sec": round(total / elapsed, 1)}
+    if write_queue is not None:
+        result["avg_batch"] = round(write_queue.operations / max(write_queue.batches, 1), 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--ops", type=int, default=100, help="depósitos por thread")
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--batch-sizes", default="1,8,32,128")
+    args = parser.parse_args()
+
+    use_temp_database()
+    setup_database(args.users)
+
+    from app.database import create_group_commit_sessionmaker, engine
+    from app.write_queue import WriteQueue
+
+    group_sessions = create_group_commit_sessionmaker()
+    # Sem log de SQL (perfil dev): o echo pesaria mais que os commits
+    engine.echo = group_sessions.kw["bind"].echo = False
+    results = {"no_queue": run(args)}
+    for max_batch in (int(size) for size in args.batch_sizes.split(",")):
+        write_queue = WriteQueue(group_sessions, window_ms=args.window_ms, max_batch=max_batch)
+        write_queue.start()
+        try:
+            results[f"batch_{max_batch}"] = run(args, write_queue)
+        finally:
+            write_queue.stop()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Suíte de carga das rotas de usuário: req/s e p50/p95/p99 por endpoint.
+
+Popula um banco temporário com N usuários e, para cada endpoint (listagem,
+detalhe, saldo, depósito, saque, transferência e criação), dispara carga
+isolada por `--duration` segundos:
+
+- asgi: em processo, via httpx.ASGITransport (sem rede nem servidor);
+- uvicorn: contra `uvicorn app.main:app` local (perfil de engine bench).
+
+O resultado sai em JSON (stdout ou --output). Com --baseline o resultado é
+comparado a um arquivo salvo anteriormente e o processo termina com código 1
+se algum endpoint perder mais que --max-rps-drop de vazão ou ganhar mais que
+--max-p95-increase de latência p95. --save-baseline grava o resultado atual
+como nova referência (números dependem da máquina: gere a baseline no mesmo
+ambiente em que a comparação vai rodar).
+
+Uso (a partir de santander-dev-week-api/):
+    python -m benchmarks.load [--users 1000] [--transport asgi|uvicorn|both]
+        [--endpoints detail,balance] [--concurrency 32] [--duration 5]
+        [--output resultado.json] [--baseline benchmarks/baseline.json]
+        [--save-baseline benchmarks/baseline.json]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import sqlite3
+import sys
+import time
+
+from benchmarks._common import drive_load, make_user_data, run_server, setup_database, use_temp_database
+
+TRANSPORTS = ("asgi", "uvicorn")
+
+# E-mails novos para POST /users, compartilhados entre os transportes
+_new_user_ids = itertools.count(10_000_000)
+
+
+def _users(n_users: int):
+    """Percorre os ids de usuário em ciclo, espalhando a carga pelo banco"""
+    return itertools.cycle(range(1, n_users + 1))
+
+
+def list_requests(n_users):
+    pages = itertools.cycle(range(0, max(n_users - 20, 1), 20))
+    return (("GET", f"/users/?skip={skip}&limit=20", None) for skip in pages)
+
+
+def detail_requests(n_users):
+    return (("GET", f"/users/{user_id}", None) for user_id in _users(n_users))
+
+
+def balance_requests(n_users):
+    return (("GET", f"/users/{user_id}/balance", None) for user_id in _users(n_users))
+
+
+def deposit_requests(n_users):
+    return (("POST", f"/users/{user_id}/deposit", {"amount": 1.0}) for user_id in _users(n_users))
+
+
+def withdraw_requests(n_users):
+    # Valor pequeno: saldo + limite do seed aguentam centenas de milhares de saques
+    return (("POST", f"/users/{user_id}/withdraw", {"amount": 0.01}) for user_id in _users(n_users))
+
+
+def transfer_requests(n_users):
+    return (
+        ("POST", f"/users/{user_id}/transfer", {"to_user_id": user_id % n_users + 1, "amount": 0.01})
+        for user_id in _users(n_users)
+    )
+
+
+def create_requests(n_users):
+    return (("POST", "/users/", make_user_data(next(_new_user_ids))) for _ in itertools.count())
+
+
+ENDPOINTS = {
+    "list": list_requests,
+    "detail": detail_requests,
+    "balance": balance_requests,
+    "deposit": deposit_requests,
+    "withdraw": withdraw_requests,
+    "transfer": transfer_requests,
+    "create": create_requests,
+}
+
+# ========== EXECUÇÃO ==========
+
+async def bench_endpoints(client, args) -> dict:
+    """Aquece e mede cada endpoint isoladamente com o mesmo cliente"""
+    results = {}
+    for name in args.endpoints:
+        factory = ENDPOINTS[name]
+        if args.warmup > 0:
+            await drive_load(client, factory(args.users), args.concurrency, args.warmup)
+        results[name] = await drive_load(client, factory(args.users), args.concurrency, args.duration)
+        result = results[name]
+        print(f"   {name:<10} {result['rps']:>9} req/s  p95 {result['p95_ms']} ms  "
+              f"erros {result['error_rate']:.1%} (4xx {result['client_errors']})", file=sys.stderr)
+    return results
+
+
+async def bench_asgi(args) -> dict:
+    import httpx
+
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=30) as client:
+            return await bench_endpoints(client, args)
+    finally:
+        from app.database import DB_MODE, async_engine, async_read_engine
+        if DB_MODE == "async":
+            await async_engine.dispose()
+            await async_read_engine.dispose()
+
+
+async def bench_uvicorn(args) -> dict:
+    import httpx
+
+    with run_server(args.port, env={"DB_MODE": args.db_mode}) as base_url:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            return await bench_endpoints(client, args)
+
+
+def run_suite(args) -> dict:
+    use_temp_database()
+    # Mesmo perfil do servidor uvicorn, também para o app em processo
+    os.environ.setdefault("DB_PROFILE", "bench")
+    os.environ.setdefault("DB_MODE", args.db_mode)
+    setup_database(args.users)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "db_mode": args.db_mode,
+        },
+        "results": {},
+    }
+    for transport in args.transports:
+        print(f"🏁 {transport}", file=sys.stderr)
+        bench = bench_asgi if transport == "asgi" else bench_uvicorn
+        report["results"][transport] = asyncio.run(bench(args))
+    return report
+
+# ========== BASELINE ==========
+
+def compare_with_baseline(report: dict, baseline: dict, max_rps_drop: float, max_p95_increase: float) -> list:
+    """Lista as regressões (transporte, endpoint, métrica, antes, depois).
+    Qualquer aumento da taxa de erros conta: vazão com respostas de erro não
+    é comparável à da baseline"""
+    regressions = []
+    for transport, endpoints in report["results"].items():
+        for name, current in endpoints.items():
+            previous = baseline.get("results", {}).get(transport, {}).get(name)
+            if previous is None:
+                continue
+            if previous["rps"] and current["rps"] < previous["rps"] * (1 - max_rps_drop):
+                regressions.append((transport, name, "rps", previous["rps"], current["rps"]))
+            if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + max_p95_increase):
+                regressions.append((transport, name, "p95_ms", previous["p95_ms"], current["p95_ms"]))
+            if current["error_rate"] > previous.get("error_rate", 0.0):
+                regressions.append((transport, name, "error_rate", previous.get("error_rate", 0.0), current["error_rate"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--transport", choices=(*TRANSPORTS, "both"), default="both")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS),
+                        help=f"lista separada por vírgula entre: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0, help="segundos de medição por endpoint")
+    parser.add_argument("--warmup", type=float, default=1.0, help="segundos de aquecimento por endpoint")
+    parser.add_argument("--db-mode", choices=("sync", "async"), default="sync")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--output", help="grava o JSON neste arquivo em vez do stdout")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--save-baseline", help="grava o resultado atual como baseline")
+    parser.add_argument("--max-rps-drop", type=float, default=0.10, help="queda máxima de req/s (fração)")
+    parser.add_argument("--max-p95-increase", type=float, default=0.25, help="aumento máximo do p95 (fração)")
+    args = parser.parse_args()
+
+    args.transports = TRANSPORTS if args.transport == "both" else (args.transport,)
+    args.endpoints = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"endpoints desconhecidos: {', '.join(sorted(unknown))}")
+
+    report = run_suite(args)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(output + "\n")
+        print(f"💾 Baseline salva em {args.save_baseline}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(report, baseline, args.max_rps_drop, args.max_p95_increase)
+        for transport, name, metric, before, after in regressions:
+            print(f"❌ {transport}/{name}: {metric} {before} -> {after}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("✅ Sem regressões em relação à baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Verifica o número de statements SQL por endpoint.
+
+Falha (exit code 1) se algum endpoint ultrapassar o orçamento definido em
+QUERY_BUDGETS, pegando regressões de N+1 nas estratégias de carregamento.
+
+Uso (a partir de santander-dev-week-api/):
+    python -m benchmarks.query_counts [--users 100]
+"""
+import argparse
+import asyncio
+import sys
+
+from benchmarks._common import count_statements, setup_database, use_temp_database
+
+# Orçamento de statements por endpoint, independente do tamanho da página
+QUERY_BUDGETS = {
+    "GET /users/": 3,
+    "GET /users/?pagination=cursor": 3,
+    "GET /users/{id}": 3,
+    "GET /users/{id}/balance": 1,
+    "GET /users/?fields=id,name": 1,
+    "GET /users/?include=account": 1,
+    "GET /users/?include=news": 2,
+    "GET /users/{id}/news": 1,
+    "GET /users/?ids=": 3,
+}
+
+
+async def measure(n_users: int) -> dict:
+    import httpx
+    from app.database import engine, read_engine
+    from app.main import app
+
+    paths = {
+        "GET /users/": f"/users/?limit={n_users}",
+        "GET /users/?pagination=cursor": f"/users/?limit={n_users}&pagination=cursor",
+        "GET /users/{id}": "/users/1",
+        "GET /users/{id}/balance": "/users/1/balance",
+        "GET /users/?fields=id,name": f"/users/?limit={n_users}&fields=id,name",
+        "GET /users/?include=account": f"/users/?limit={n_users}&include=account",
+        "GET /users/?include=news": f"/users/?limit={n_users}&include=news",
+        "GET /users/{id}/news": "/users/1/news",
+        "GET /users/?ids=": "/users/?ids=" + ",".join(str(i) for i in range(n_users, 0, -1)),
+    }
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, path in paths.items():
+            with count_statements(engine, read_engine) as counter:
+                response = await client.get(path)
+            response.raise_for_status()
+            results[name] = counter["count"]
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100, help="usuários no dataset")
+    args = parser.parse_args()
+
+    use_temp_database()
+    setup_database(args.users)
+    results = asyncio.run(measure(args.users))
+
+    failed = False
+    print(f"{'endpoint':<34}{'statements':>12}{'orçamento':>12}")
+    for name, count in results.items():
+        budget = QUERY_BUDGETS[name]
+        flag = "" if count <= budget else "  ❌"
+        failed = failed or count > budget
+        print(f"{name:<34}{count:>12}{budget:>12}{flag}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
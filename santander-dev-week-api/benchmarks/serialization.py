@@ -0,0 +1,86 @@
+"""
+Custo de serialização por usuário de uma página de GET /users.
+
+Carrega uma página (estratégia "list", a mesma da rota) e mede três caminhos
+sobre os mesmos objetos ORM:
+
+- fastapi: o que o response_model fazia (validação from_attributes do grafo,
+  dump para tipos JSON e json.dumps do JSONResponse);
+- typeadapter: TypeAdapter pré-compilado validando e gerando o JSON direto;
+- orjson: colunas do ORM para dict e orjson.dumps, sem validação.
+
+Também confere que os três produzem o mesmo JSON.
+
+Uso (a partir de santander-dev-week-api/):
+    python -m benchmarks.serialization [--users 500] [--rounds 20]
+"""
+import argparse
+import json
+import time
+
+from benchmarks._common import setup_database, use_temp_database
+
+
+def fastapi_default(users) -> bytes:
+    from app.models import UserResponse
+
+    content = [UserResponse.model_validate(db_user).model_dump(mode="json") for db_user in users]
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def typeadapter(users) -> bytes:
+    from app.serialization import USER_LIST_ADAPTER
+
+    return USER_LIST_ADAPTER.dump_json(USER_LIST_ADAPTER.validate_python(users, from_attributes=True))
+
+
+def orjson_direct(users) -> bytes:
+    import orjson
+
+    from app.serialization import user_to_dict
+
+    return orjson.dumps([user_to_dict(db_user) for db_user in users])
+
+
+STRATEGIES = {"fastapi": fastapi_default, "typeadapter": typeadapter, "orjson": orjson_direct}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    use_temp_database()
+    setup_database(args.users)
+
+    from app import crud
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        users = crud.get_users(db, skip=0, limit=args.users)
+        outputs = {name: encode(users) for name, encode in STRATEGIES.items()}
+        if len({json.dumps(json.loads(payload)) for payload in outputs.values()}) != 1:
+            raise SystemExit("❌ As estratégias geraram JSON diferente")
+        identical = outputs["typeadapter"] == outputs["orjson"]
+
+        results = {}
+        for name, encode in STRATEGIES.items():
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                encode(users)
+            elapsed = time.perf_counter() - start
+            per_user = elapsed / (args.rounds * len(users)) * 1e6
+            results[name] = {"us_per_user": round(per_user, 2), "ms_per_page": round(per_user * len(users) / 1000, 2)}
+    finally:
+        db.close()
+
+    baseline = results["fastapi"]["us_per_user"]
+    for result in results.values():
+        result["speedup"] = round(baseline / result["us_per_user"], 2)
+    print(json.dumps({"page_size": len(users), "bytes_identical": identical, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
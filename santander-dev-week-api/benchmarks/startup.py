@@ -0,0 +1,87 @@
+"""
+Tempo até a primeira requisição servida ao subir `uvicorn app.main:app`.
+
+Para cada tamanho de banco e modo de boot, sobe o servidor várias vezes e
+mede o tempo entre o início do processo e o primeiro 200 do GET /health
+(que também consulta o banco):
+
+- full: FAST_BOOT=false, conferência/migração via Alembic, seed e banner;
+- fast: FAST_BOOT=true, só a leitura de alembic_version (seed fora do boot).
+
+Uso (a partir de santander-dev-week-api/):
+    python -m benchmarks.startup [--users 2,10000] [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks._common import setup_database, use_temp_database
+
+MODES = {
+    "full": {"FAST_BOOT": "false", "DB_AUTO_MIGRATE": "true"},
+    "fast": {"FAST_BOOT": "true", "DB_AUTO_MIGRATE": "false"},
+}
+
+
+def time_to_first_request(env: dict, port: int) -> float:
+    """Segundos do Popen até o primeiro GET /health com status 200"""
+    import httpx
+
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            if process.poll() is not None or time.perf_counter() - start > 60:
+                raise RuntimeError(f"uvicorn não respondeu na porta {port}")
+            time.sleep(0.005)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def bench_size(n_users: int, args) -> dict:
+    # Um banco por tamanho; ambos os modos sobem sobre o mesmo arquivo
+    url = use_temp_database(f"startup-{n_users}.db")
+    setup_database(n_users)
+
+    results = {}
+    for mode, mode_env in MODES.items():
+        env = {**os.environ, "DATABASE_URL": url, "DB_PROFILE": "bench", **mode_env}
+        samples = [time_to_first_request(env, args.port) * 1000 for _ in range(args.runs)]
+        results[mode] = {
+            "median_ms": round(statistics.median(samples), 1),
+            "min_ms": round(min(samples), 1),
+            "max_ms": round(max(samples), 1),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", default="2,10000", help="tamanhos de banco separados por vírgula")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    results = {}
+    for n_users in (int(size) for size in args.users.split(",")):
+        results[f"{n_users}_users"] = bench_size(n_users, args)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
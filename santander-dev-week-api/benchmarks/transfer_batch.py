@@ -0,0 +1,64 @@
+"""
+Transferências uma a uma (crud.transfer_money, um commit cada) versus o lote
+de crud.transfer_batch, nos modos atomic e best_effort.
+
+Uso (a partir de santander-dev-week-api/):
+    python -m benchmarks.transfer_batch [--users 1000] [--transfers 5000]
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmarks._common import count_statements, setup_database, use_temp_database
+
+
+def make_transfers(n_users: int, n_transfers: int) -> list:
+    rng = random.Random(42)
+    transfers = []
+    while len(transfers) < n_transfers:
+        src, dst = rng.randint(1, n_users), rng.randint(1, n_users)
+        if src != dst:
+            transfers.append({"from_user_id": src, "to_user_id": dst, "amount": 1.0})
+    return transfers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--transfers", type=int, default=5000)
+    args = parser.parse_args()
+
+    use_temp_database()
+    setup_database(args.users)
+
+    from app import crud
+    from app.database import SessionLocal, engine
+
+    transfers = make_transfers(args.users, args.transfers)
+    runs = {
+        "individual": lambda db: [crud.transfer_money(db, t["from_user_id"], t["to_user_id"], t["amount"]) for t in transfers],
+        "batch_atomic": lambda db: crud.transfer_batch(db, transfers, atomic=True),
+        "batch_best_effort": lambda db: crud.transfer_batch(db, transfers, atomic=False),
+    }
+
+    results = {}
+    for name, run in runs.items():
+        db = SessionLocal()
+        try:
+            with count_statements(engine) as counter:
+                start = time.perf_counter()
+                run(db)
+                elapsed = time.perf_counter() - start
+        finally:
+            db.close()
+        results[name] = {
+            "seconds": round(elapsed, 3),
+            "transfers_per_sec": round(len(transfers) / elapsed, 1),
+            "statements": counter["count"],
+        }
+    print(json.dumps({"transfers": len(transfers), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Índices nas FKs de features/news e e-mail único
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Sem índice, cada carga de relacionamento varre features/news inteiras
+    op.create_index("ix_features_user_id", "features", ["user_id"])
+    op.create_index("ix_news_user_id", "news", ["user_id"])
+
+    duplicated = op.get_bind().execute(sa.text(
+        "SELECT email FROM users WHERE email IS NOT NULL "
+        "GROUP BY email HAVING COUNT(*) > 1"
+    )).scalars().all()
+    if duplicated:
+        raise RuntimeError(
+            "E-mails duplicados impedem o índice único em users.email: "
+            + ", ".join(duplicated)
+        )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_index("ix_news_user_id", table_name="news")
+    op.drop_index("ix_features_user_id", table_name="features")
@@ -0,0 +1,74 @@
+"""Tabelas de resumo do GET /stats e faixa de saldo nas contas
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Cópia de app.models.BALANCE_BUCKETS na data desta revisão
+BALANCE_BUCKETS = (0.0, 1000.0, 5000.0, 10000.0, 50000.0, 100000.0)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("accounts") as batch_op:
+        batch_op.add_column(sa.Column("balance_bucket", sa.Integer(), nullable=True))
+
+    bucket_case = " ".join(
+        f"WHEN COALESCE(balance, 0) < {edge} THEN {bucket}"
+        for bucket, edge in enumerate(BALANCE_BUCKETS)
+    )
+    op.execute(f"UPDATE accounts SET balance_bucket = CASE {bucket_case} ELSE {len(BALANCE_BUCKETS)} END")
+
+    with op.batch_alter_table("accounts") as batch_op:
+        batch_op.alter_column("balance_bucket", existing_type=sa.Integer(), nullable=False)
+
+    op.create_table(
+        "agency_stats",
+        sa.Column("agency", sa.String(length=20), nullable=False),
+        sa.Column("users", sa.Integer(), nullable=False),
+        sa.Column("total_balance", sa.Float(), nullable=False),
+        sa.Column("total_limit", sa.Float(), nullable=False),
+        sa.Column("total_card_limit", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("agency"),
+    )
+    op.create_table(
+        "balance_bucket_stats",
+        sa.Column("bucket", sa.Integer(), nullable=False),
+        sa.Column("users", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("bucket"),
+    )
+
+    # Carga inicial a partir das contas existentes; daí em diante o crud
+    # mantém os totais a cada mutação
+    op.execute(
+        "INSERT INTO agency_stats (agency, users, total_balance, total_limit, total_card_limit) "
+        "SELECT accounts.agency, COUNT(*), COALESCE(SUM(accounts.balance), 0), "
+        "COALESCE(SUM(accounts.\"limit\"), 0), COALESCE(SUM(cards.\"limit\"), 0) "
+        "FROM accounts LEFT OUTER JOIN cards ON cards.user_id = accounts.user_id "
+        "GROUP BY accounts.agency"
+    )
+    op.execute(
+        "INSERT INTO balance_bucket_stats (bucket, users) "
+        "SELECT balance_bucket, COUNT(*) FROM accounts GROUP BY balance_bucket"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("balance_bucket_stats")
+    op.drop_table("agency_stats")
+    with op.batch_alter_table("accounts") as batch_op:
+        batch_op.drop_column("balance_bucket")
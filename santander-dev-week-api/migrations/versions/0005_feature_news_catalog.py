@@ -0,0 +1,78 @@
+"""Catálogo compartilhado de features e news com vínculos por usuário
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 09:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# tabela do catálogo -> (tabela de vínculo, coluna que aponta para o catálogo)
+CATALOGS = {
+    "features": ("user_features", "feature_id"),
+    "news": ("user_news", "news_id"),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, (link_table, column) in CATALOGS.items():
+        op.create_table(
+            link_table,
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column(column, sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint([column], [f"{table}.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("user_id", column, name=f"uq_{link_table}_user_{column[:-3]}"),
+        )
+
+        # Cada (ícone, descrição) fica com a menor id; os vínculos seguem a
+        # ordem original das linhas de cada usuário
+        op.execute(
+            f"INSERT INTO {link_table} (user_id, {column}) "
+            f"SELECT copies.user_id, canonical.id FROM {table} AS copies "
+            f"JOIN (SELECT MIN(id) AS id, icon, description FROM {table} GROUP BY icon, description) AS canonical "
+            f"ON canonical.icon = copies.icon AND canonical.description = copies.description "
+            f"WHERE copies.user_id IN (SELECT id FROM users) "
+            f"GROUP BY copies.user_id, canonical.id "
+            f"ORDER BY MIN(copies.id)"
+        )
+        op.execute(f"DELETE FROM {table} WHERE id NOT IN (SELECT MIN(id) FROM {table} GROUP BY icon, description)")
+
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_index(f"ix_{table}_user_id")
+            batch_op.drop_column("user_id")
+            batch_op.create_unique_constraint(f"uq_{table}_icon_description", ["icon", "description"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, (link_table, column) in CATALOGS.items():
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(f"uq_{table}_icon_description", type_="unique")
+            batch_op.add_column(sa.Column("user_id", sa.Integer(), nullable=True))
+            batch_op.create_foreign_key(f"fk_{table}_user_id", "users", ["user_id"], ["id"])
+
+        # Volta a uma cópia por usuário; os itens do catálogo saem
+        op.execute(
+            f"INSERT INTO {table} (icon, description, user_id) "
+            f"SELECT catalog.icon, catalog.description, links.user_id FROM {link_table} AS links "
+            f"JOIN {table} AS catalog ON catalog.id = links.{column} "
+            f"ORDER BY links.id"
+        )
+        op.execute(f"DELETE FROM {table} WHERE user_id IS NULL")
+        op.create_index(f"ix_{table}_user_id", table, ["user_id"])
+
+        op.drop_table(link_table)
@@ -0,0 +1,27 @@
+"""Índice do feed paginado de notícias por usuário
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 09:50:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_user_news_user_id_id", "user_news", ["user_id", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_user_news_user_id_id", table_name="user_news")
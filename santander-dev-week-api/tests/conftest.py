@@ -0,0 +1,48 @@
+"""
+Configuração comum dos testes.
+
+O banco precisa ser apontado para um SQLite temporário antes de qualquer
+import de `app`, pois o engine é criado na importação de `app.database`.
+Testes que conferem totais usam a fixture `db`, com um banco só deles.
+"""
+import os
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+os.environ.setdefault("DB_PROFILE", "bench")
+
+from benchmarks._common import use_temp_database  # noqa: E402
+
+use_temp_database("tests.db")
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    """Engine de um SQLite próprio do teste, já na revisão head"""
+    from app.database import create_profiled_engine
+    from app.schema import upgrade_to_head
+
+    engine = create_profiled_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    upgrade_to_head(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(db_engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def make_users(db):
+    """Cria usuários sintéticos (benchmarks._common.make_user_data); devolve os ids"""
+    from app import crud
+    from benchmarks._common import make_user_data
+
+    def _make_users(count: int, start: int = 1) -> list:
+        return crud.create_users_bulk(db, [make_user_data(i) for i in range(start, start + count)])
+
+    return _make_users
@@ -0,0 +1,97 @@
+"""
+Cache de usuário e saldo (app/cache.py): a invalidação só acontece depois do
+commit, é descartada no rollback e uma leitura iniciada antes de uma escrita
+não grava o valor antigo no cache.
+"""
+import pytest
+
+from app import cache, crud
+from app.cache import UserCache
+
+
+@pytest.fixture
+def user_cache(monkeypatch) -> UserCache:
+    """Cache ligado e vazio no lugar do global (que os eventos de sessão usam)"""
+    fresh = UserCache(ttl=60, max_entries=100, enabled=True)
+    monkeypatch.setattr(cache, "user_cache", fresh)
+    return fresh
+
+
+def cached(user_cache, user_id, kind="balance"):
+    payload, _ = user_cache.lookup(kind, user_id)
+    return payload
+
+
+def warm(user_cache, *user_ids):
+    for user_id in user_ids:
+        for kind in cache.KINDS:
+            _, version = user_cache.lookup(kind, user_id)
+            user_cache.store(kind, user_id, b"antigo", version)
+
+
+def test_commit_invalidates_touched_users(db, make_users, user_cache):
+    make_users(3)
+    warm(user_cache, 1, 2, 3)
+
+    crud.transfer_money(db, 1, 2, 10.0)
+
+    assert cached(user_cache, 1) is None
+    assert cached(user_cache, 2, "user") is None
+    assert cached(user_cache, 3) == b"antigo"
+
+
+def test_invalidation_waits_for_the_commit(db, make_users, user_cache):
+    make_users(1)
+    warm(user_cache, 1)
+
+    crud._apply_deposit(db, 1, 10.0)
+    db.flush()
+    assert cached(user_cache, 1) == b"antigo"
+
+    db.commit()
+    assert cached(user_cache, 1) is None
+
+
+def test_rollback_discards_the_pending_invalidation(db, make_users, user_cache):
+    make_users(2)
+    warm(user_cache, 1, 2)
+
+    with pytest.raises(ValueError):
+        crud.withdraw_money(db, 1, 1_000_000.0)
+    assert cached(user_cache, 1) == b"antigo"
+
+    # O próximo commit da mesma sessão não leva a invalidação descartada junto
+    crud.deposit_money(db, 2, 10.0)
+    assert cached(user_cache, 1) == b"antigo"
+    assert cached(user_cache, 2) is None
+
+
+def test_read_started_before_a_write_is_not_stored(db, make_users, user_cache):
+    make_users(1)
+    _, version = user_cache.lookup("balance", 1)
+
+    crud.deposit_money(db, 1, 10.0)
+    user_cache.store("balance", 1, b"lido antes do deposito", version)
+
+    assert cached(user_cache, 1) is None
+
+
+def test_version_map_is_bounded_and_still_rejects_stale_reads():
+    user_cache = UserCache(ttl=60, max_entries=2, enabled=True)
+    _, version = user_cache.lookup("balance", 1)
+
+    user_cache.invalidate_users([1])
+    user_cache.invalidate_users([2, 3])
+
+    assert user_cache.stats()["tracked_versions"] == 2
+    # A geração do usuário 1 foi esquecida, mas a leitura antiga é recusada
+    user_cache.store("balance", 1, b"antigo", version)
+    assert cached(user_cache, 1) is None
+
+
+def test_disabled_cache_never_stores():
+    user_cache = UserCache(enabled=False)
+    _, version = user_cache.lookup("user", 1)
+    user_cache.store("user", 1, b"payload", version)
+    assert cached(user_cache, 1, "user") is None
+    assert user_cache.stats()["entries"] == 0
@@ -0,0 +1,96 @@
+"""
+Migração 0005 (catálogo de features e news): cópias repetidas de
+(ícone, descrição) viram um único item do catálogo, e os vínculos mantêm a
+ordem original de cada usuário sem repetir item.
+"""
+import pytest
+from alembic import command
+from sqlalchemy import create_engine, text
+
+from app.schema import alembic_config
+
+# (id, user_id, ícone, descrição) em 0004, uma cópia por usuário
+FEATURES = [
+    (1, 1, "💰", "Pix"),
+    (2, 1, "💸", "Transferência"),
+    (3, 2, "💸", "Transferência"),
+    (4, 2, "💰", "Pix"),
+    (5, 2, "💰", "Pix"),  # repetida no mesmo usuário
+    (6, 2, "🛒", "Pagamentos"),
+    (7, 3, "💰", "Pix"),
+    (8, None, "💳", "Cartão"),  # órfã: fica no catálogo, sem vínculo
+]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+    yield engine
+    engine.dispose()
+
+
+def migrate(engine, revision: str, direction=command.upgrade):
+    with engine.begin() as connection:
+        direction(alembic_config(connection), revision)
+
+
+def links(connection, link_table: str, column: str, catalog: str) -> dict:
+    rows = connection.execute(text(
+        f"SELECT links.user_id, catalog.description FROM {link_table} AS links "
+        f"JOIN {catalog} AS catalog ON catalog.id = links.{column} ORDER BY links.id"
+    ))
+    result = {}
+    for user_id, description in rows:
+        result.setdefault(user_id, []).append(description)
+    return result
+
+
+def seed_before_catalog(engine):
+    """Banco em 0004 com as cópias de FEATURES em features e em news"""
+    migrate(engine, "0004")
+    with engine.begin() as connection:
+        for user_id in (1, 2, 3):
+            connection.execute(
+                text("INSERT INTO users (id, name, email) VALUES (:id, :name, :email)"),
+                {"id": user_id, "name": f"Cliente {user_id}", "email": f"cliente{user_id}@santander.com"}
+            )
+        for table in ("features", "news"):
+            connection.execute(
+                text(f"INSERT INTO {table} (id, user_id, icon, description) VALUES (:id, :user_id, :icon, :description)"),
+                [dict(zip(("id", "user_id", "icon", "description"), row)) for row in FEATURES]
+            )
+
+
+def test_upgrade_deduplicates_existing_rows(engine):
+    seed_before_catalog(engine)
+
+    migrate(engine, "0005")
+
+    with engine.connect() as connection:
+        for table, link_table, column in (("features", "user_features", "feature_id"),
+                                           ("news", "user_news", "news_id")):
+            catalog = connection.execute(text(f"SELECT id, description FROM {table} ORDER BY id")).all()
+            # Cada conteúdo fica com a menor id entre as cópias
+            assert [tuple(row) for row in catalog] == [
+                (1, "Pix"), (2, "Transferência"), (6, "Pagamentos"), (8, "Cartão")
+            ]
+            assert links(connection, link_table, column, table) == {
+                1: ["Pix", "Transferência"],
+                2: ["Transferência", "Pix", "Pagamentos"],
+                3: ["Pix"],
+            }
+
+
+def test_downgrade_restores_one_copy_per_link(engine):
+    seed_before_catalog(engine)
+    migrate(engine, "0005")
+
+    migrate(engine, "0004", command.downgrade)
+
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT user_id, description FROM features ORDER BY id")).all()
+        assert [tuple(row) for row in rows] == [
+            (1, "Pix"), (1, "Transferência"),
+            (2, "Transferência"), (2, "Pix"), (2, "Pagamentos"),
+            (3, "Pix"),
+        ]
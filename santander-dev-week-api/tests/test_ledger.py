@@ -0,0 +1,74 @@
+"""
+Extrato (ledger): todo saldo alterado por depósito, saque, transferência ou
+lote de transferências tem de bater com o reconstruído por rebuild_balance,
+inclusive depois de passar por snapshots (SNAPSHOT_INTERVAL).
+"""
+import random
+
+import pytest
+
+from app import crud
+from app.models import AccountDB, BalanceSnapshotDB, TransactionDB
+
+N_USERS = 5
+
+
+def assert_ledger_matches(db):
+    for account in db.query(AccountDB).all():
+        assert crud.rebuild_balance(db, account.id) == pytest.approx(account.balance), account.user_id
+
+
+def test_opening_entry_matches_initial_balance(db, make_users):
+    make_users(N_USERS)
+    assert db.query(TransactionDB).filter(TransactionDB.kind == "ABE").count() == N_USERS
+    assert_ledger_matches(db)
+
+
+def test_random_operations_keep_ledger_consistent(db, make_users):
+    make_users(N_USERS)
+    rng = random.Random(42)
+    # Operações suficientes para as contas passarem de SNAPSHOT_INTERVAL lançamentos
+    for _ in range(crud.SNAPSHOT_INTERVAL * N_USERS):
+        a, b = rng.sample(range(1, N_USERS + 1), 2)
+        amount = float(rng.randint(1, 300))
+        operation = rng.choice(("deposit", "withdraw", "transfer"))
+        try:
+            if operation == "deposit":
+                crud.deposit_money(db, a, amount)
+            elif operation == "withdraw":
+                crud.withdraw_money(db, a, amount)
+            else:
+                crud.transfer_money(db, a, b, amount)
+        except ValueError:
+            pass
+    crud.transfer_batch(db, [
+        {"from_user_id": a, "to_user_id": b, "amount": 5.0}
+        for a, b in zip(range(1, N_USERS), range(2, N_USERS + 1))
+    ])
+
+    assert db.query(BalanceSnapshotDB).count() > 0
+    assert_ledger_matches(db)
+
+
+def test_failed_operation_writes_no_entry(db, make_users):
+    make_users(2)
+    entries = db.query(TransactionDB).count()
+
+    with pytest.raises(ValueError):
+        crud.withdraw_money(db, 1, 1_000_000.0)
+    with pytest.raises(ValueError):
+        crud.transfer_money(db, 1, 2, 1_000_000.0)
+    assert crud.deposit_money(db, 999, 10.0) is None
+
+    assert db.query(TransactionDB).count() == entries
+    assert_ledger_matches(db)
+
+
+def test_transfer_writes_both_sides(db, make_users):
+    make_users(2)
+    crud.transfer_money(db, 1, 2, 150.0)
+
+    entries = crud.get_transactions(db, 1, limit=1) + crud.get_transactions(db, 2, limit=1)
+    assert [(entry.kind, entry.amount) for entry in entries] == [("TRF", -150.0), ("TRF", 150.0)]
+    assert entries[0].counterparty_account_id == entries[1].account_id
+    assert_ledger_matches(db)
@@ -0,0 +1,30 @@
+"""
+Orçamento de statements SQL por endpoint (QUERY_BUDGETS em
+benchmarks/query_counts.py): falha se uma estratégia de carregamento voltar
+a fazer N+1.
+"""
+import asyncio
+
+import pytest
+
+from benchmarks._common import setup_database
+from benchmarks.query_counts import QUERY_BUDGETS, measure
+
+# Páginas com vários usuários: um N+1 estoura o orçamento por muito
+N_USERS = 100
+
+
+@pytest.fixture(scope="module")
+def statement_counts() -> dict:
+    setup_database(N_USERS)
+    return asyncio.run(measure(N_USERS))
+
+
+def test_every_endpoint_has_a_budget(statement_counts):
+    assert set(statement_counts) == set(QUERY_BUDGETS)
+
+
+@pytest.mark.parametrize("endpoint", list(QUERY_BUDGETS))
+def test_statement_budget(statement_counts, endpoint):
+    count, budget = statement_counts[endpoint], QUERY_BUDGETS[endpoint]
+    assert count <= budget, f"{endpoint}: {count} statements (orçamento {budget})"
@@ -0,0 +1,38 @@
+"""
+Conferência de revisão no boot: HEAD_REVISION acompanha as migrações e o
+boot rápido recusa banco fora dela.
+"""
+import pytest
+from sqlalchemy import create_engine
+
+from app.schema import HEAD_REVISION, alembic_config, head_revision, stamped_revision, upgrade_to_head
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_head_revision_constant_matches_migrations():
+    assert HEAD_REVISION == head_revision()
+
+
+def test_stamped_revision_rejects_unmigrated_database(sqlite_engine):
+    with pytest.raises(RuntimeError, match="sem migrações"):
+        stamped_revision(sqlite_engine)
+
+
+def test_stamped_revision_rejects_old_revision(sqlite_engine):
+    from alembic import command
+
+    with sqlite_engine.begin() as connection:
+        command.upgrade(alembic_config(connection), "0003")
+    with pytest.raises(RuntimeError, match="revisão 0003"):
+        stamped_revision(sqlite_engine)
+
+
+def test_stamped_revision_accepts_head(sqlite_engine):
+    upgrade_to_head(sqlite_engine)
+    assert stamped_revision(sqlite_engine) == HEAD_REVISION
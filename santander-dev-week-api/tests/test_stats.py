@@ -0,0 +1,88 @@
+"""
+GET /stats (crud.get_stats): os totais mantidos incrementalmente a cada
+criação, depósito, transferência e remoção têm de bater com os recalculados
+por rebuild_stats a partir das contas.
+"""
+import pytest
+
+from app import crud
+from benchmarks._common import make_user_data
+
+
+def users_per_bucket(stats) -> list:
+    return [bucket["users"] for bucket in stats["balance_distribution"]]
+
+
+def assert_matches_rebuild(db):
+    """Compara o /stats incremental com um recálculo completo"""
+    incremental = crud.get_stats(db)
+    crud.rebuild_stats(db)
+    rebuilt = crud.get_stats(db)
+    assert incremental["total_users"] == rebuilt["total_users"]
+    assert incremental["agencies"] == rebuilt["agencies"]
+    assert users_per_bucket(incremental) == users_per_bucket(rebuilt)
+    for key in ("total_balance", "average_balance", "total_limit", "total_card_limit"):
+        assert incremental[key] == pytest.approx(rebuilt[key]), key
+    return incremental
+
+
+def test_stats_follow_every_mutation(db, make_users):
+    # make_user_data: saldo 1000 (faixa [1000, 5000)), limite 1000, cartão 2000
+    make_users(4)
+    stats = assert_matches_rebuild(db)
+    assert (stats["total_users"], stats["total_balance"], stats["total_card_limit"]) == (4, 4000.0, 8000.0)
+    assert users_per_bucket(stats)[2] == 4
+
+    crud.deposit_money(db, 1, 5000.0)
+    stats = assert_matches_rebuild(db)
+    assert stats["total_balance"] == 9000.0
+    assert users_per_bucket(stats)[2:4] == [3, 1]
+
+    # Saldo negativo (dentro do limite) cai na primeira faixa
+    crud.transfer_money(db, 2, 3, 1500.0)
+    stats = assert_matches_rebuild(db)
+    assert stats["total_balance"] == 9000.0
+    assert users_per_bucket(stats)[:4] == [1, 0, 2, 1]
+
+    crud.transfer_batch(db, [
+        {"from_user_id": 1, "to_user_id": 2, "amount": 2000.0},
+        {"from_user_id": 4, "to_user_id": 3, "amount": 50.0},
+    ])
+    stats = assert_matches_rebuild(db)
+    assert stats["total_balance"] == 9000.0
+
+    crud.withdraw_money(db, 3, 450.0)
+    stats = assert_matches_rebuild(db)
+    assert stats["total_balance"] == 8550.0
+
+    crud.create_user(db, make_user_data(5))
+    stats = assert_matches_rebuild(db)
+    assert (stats["total_users"], stats["total_balance"]) == (5, 9550.0)
+
+    assert crud.delete_user(db, 1)
+    stats = assert_matches_rebuild(db)
+    assert (stats["total_users"], stats["total_balance"], stats["total_card_limit"]) == (4, 5550.0, 8000.0)
+
+
+def test_agency_drops_out_when_its_last_user_is_deleted(db, make_users):
+    # Agência = 2000 + i % 50: os usuários 1 e 2 ficam em agências diferentes
+    make_users(2)
+    assert crud.delete_user(db, 2)
+
+    stats = assert_matches_rebuild(db)
+    assert [agency["agency"] for agency in stats["agencies"]] == ["2001"]
+    assert stats["average_balance"] == 1000.0
+
+
+def test_failed_operations_leave_stats_unchanged(db, make_users):
+    make_users(2)
+    before = crud.get_stats(db)
+
+    with pytest.raises(ValueError):
+        crud.withdraw_money(db, 1, 1_000_000.0)
+    crud.transfer_batch(db, [
+        {"from_user_id": 1, "to_user_id": 2, "amount": 100.0},
+        {"from_user_id": 2, "to_user_id": 1, "amount": 1_000_000.0},
+    ], atomic=True)
+
+    assert crud.get_stats(db) == before
@@ -0,0 +1,117 @@
+"""
+POST /transfers/batch (crud.transfer_batch): atomic é tudo ou nada,
+best_effort aplica as válidas, e o compare-and-set refaz o lote quando o
+saldo muda entre a leitura e o UPDATE.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app import crud
+from app.models import AccountDB, TransactionDB
+
+# make_user_data: saldo 1000 e limite 1000 por conta
+INITIAL_BALANCE = 1000.0
+
+
+def balances(db) -> dict:
+    db.expire_all()
+    return dict(db.query(AccountDB.user_id, AccountDB.balance).all())
+
+
+def transfer(src, dst, amount) -> dict:
+    return {"from_user_id": src, "to_user_id": dst, "amount": amount}
+
+
+# 1 -> 2 cabe no saldo + limite; 3 -> 1 não
+MIXED_BATCH = [transfer(1, 2, 300.0), transfer(3, 1, 5000.0)]
+
+
+def test_atomic_rolls_back_everything_when_one_item_fails(db, make_users):
+    make_users(3)
+    entries = db.query(TransactionDB).count()
+
+    results = crud.transfer_batch(db, MIXED_BATCH, atomic=True)
+
+    assert [result["status"] for result in results] == ["rolled_back", "failed"]
+    assert results[1]["error"] == "Saldo insuficiente para transferência"
+    assert balances(db) == {1: INITIAL_BALANCE, 2: INITIAL_BALANCE, 3: INITIAL_BALANCE}
+    assert db.query(TransactionDB).count() == entries
+
+
+def test_best_effort_applies_the_valid_items(db, make_users):
+    make_users(3)
+
+    results = crud.transfer_batch(db, MIXED_BATCH, atomic=False)
+
+    assert [result["status"] for result in results] == ["applied", "failed"]
+    assert results[0]["new_balance_from"] == 700.0
+    assert results[0]["new_balance_to"] == 1300.0
+    assert balances(db) == {1: 700.0, 2: 1300.0, 3: INITIAL_BALANCE}
+
+
+def test_items_see_the_balance_left_by_earlier_items(db, make_users):
+    make_users(3)
+
+    # O segundo só cabe com o crédito do primeiro; o terceiro não cabe no
+    # que sobrou da conta 1
+    results = crud.transfer_batch(db, [
+        transfer(1, 2, 1500.0), transfer(2, 3, 2400.0), transfer(1, 3, 600.0)
+    ], atomic=False)
+
+    assert [result["status"] for result in results] == ["applied", "applied", "failed"]
+    assert balances(db) == {1: -500.0, 2: 100.0, 3: 3400.0}
+
+
+def test_invalid_items_are_reported(db, make_users):
+    make_users(2)
+
+    results = crud.transfer_batch(db, [transfer(1, 1, 10.0), transfer(1, 99, 10.0)], atomic=False)
+
+    assert [result["error"] for result in results] == [
+        "Conta de origem e destino devem ser diferentes",
+        "Uma das contas não existe",
+    ]
+
+
+def stale_reads(monkeypatch, times: int) -> list:
+    """Faz as `times` primeiras leituras do lote verem um saldo de conta 1
+    diferente do gravado, como se outra transação o tivesse alterado"""
+    calls = []
+    lock_accounts = crud._lock_accounts
+
+    def _stale_lock_accounts(db, user_ids):
+        accounts = lock_accounts(db, user_ids)
+        calls.append(None)
+        if len(calls) <= times:
+            read = accounts[1]
+            accounts[1] = SimpleNamespace(**{**read._asdict(), "balance": read.balance - 50.0})
+        return accounts
+
+    monkeypatch.setattr(crud, "_lock_accounts", _stale_lock_accounts)
+    return calls
+
+
+def test_compare_and_set_conflict_retries_the_batch(db, make_users, monkeypatch):
+    make_users(2)
+    calls = stale_reads(monkeypatch, times=1)
+
+    results = crud.transfer_batch(db, [transfer(1, 2, 100.0)])
+
+    assert len(calls) == 2
+    assert results[0]["status"] == "applied"
+    # Calculado sobre o saldo relido, não sobre o desatualizado
+    assert balances(db) == {1: 900.0, 2: 1100.0}
+
+
+def test_compare_and_set_gives_up_after_the_retries(db, make_users, monkeypatch):
+    make_users(2)
+    entries = db.query(TransactionDB).count()
+    calls = stale_reads(monkeypatch, times=crud.TRANSFER_BATCH_RETRIES)
+
+    with pytest.raises(RuntimeError, match="concorrentes"):
+        crud.transfer_batch(db, [transfer(1, 2, 100.0)])
+
+    assert len(calls) == crud.TRANSFER_BATCH_RETRIES
+    assert balances(db) == {1: INITIAL_BALANCE, 2: INITIAL_BALANCE}
+    assert db.query(TransactionDB).count() == entries
@@ -0,0 +1,56 @@
+"""
+POST /users/bulk (crud.create_users_bulk): um e-mail repetido no lote é
+isolado por bisseção, sem derrubar os demais registros e sem voltar a um
+commit por linha.
+"""
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from app import crud
+from app.models import AccountDB, TransactionDB, UserDB
+from benchmarks._common import make_user_data
+
+BATCH = 64
+
+
+@pytest.fixture
+def commits(db_engine) -> list:
+    calls = []
+    event.listen(db_engine, "commit", lambda conn: calls.append(None))
+    return calls
+
+
+def test_clean_batch_is_one_commit(db, commits):
+    user_ids = crud.create_users_bulk(db, [make_user_data(i) for i in range(1, BATCH + 1)])
+
+    assert user_ids == list(range(1, BATCH + 1))
+    assert len(commits) == 1
+
+
+def test_duplicate_email_is_isolated_by_bisection(db, commits):
+    users = [make_user_data(i) for i in range(1, BATCH + 1)]
+    duplicate = 40
+    users[duplicate]["email"] = users[3]["email"]
+
+    results = crud.create_users_bulk(db, users)
+
+    assert isinstance(results[duplicate], IntegrityError)
+    created = [result for index, result in enumerate(results) if index != duplicate]
+    assert all(isinstance(user_id, int) for user_id in created)
+    assert db.query(UserDB).count() == db.query(AccountDB).count() == BATCH - 1
+    assert db.query(TransactionDB).count() == BATCH - 1
+    # Um registro ruim custa ~log2(BATCH) commits, não um por linha
+    assert len(commits) <= 2 * BATCH.bit_length()
+
+
+def test_email_already_in_database(db, make_users):
+    make_users(1)
+    users = [make_user_data(i) for i in range(1, 5)]
+
+    results = crud.create_users_bulk(db, users)
+
+    assert isinstance(results[0], IntegrityError)
+    assert [user.email for user in db.query(UserDB).order_by(UserDB.id)] == [
+        user["email"] for user in users
+    ]
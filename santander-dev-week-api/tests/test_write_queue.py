@@ -0,0 +1,46 @@
+"""
+Fila de group commit: uma falha ao abrir a sessão do lote chega aos Futures
+sem derrubar a thread escritora, e submit com a fila parada não trava.
+"""
+import pytest
+
+from app.database import SessionLocal
+from app.write_queue import WriteQueue
+
+
+def answer(db, value):
+    return value
+
+
+@pytest.fixture
+def flaky_queue():
+    """Fila cuja primeira sessão falha ao abrir (banco fora do ar)"""
+    calls = []
+
+    def session_factory():
+        calls.append(None)
+        if len(calls) == 1:
+            raise ConnectionError("banco indisponível")
+        return SessionLocal()
+
+    write_queue = WriteQueue(session_factory, window_ms=0)
+    write_queue.start()
+    yield write_queue
+    write_queue.stop()
+
+
+def test_session_failure_reaches_the_batch_and_the_thread_survives(flaky_queue):
+    with pytest.raises(ConnectionError):
+        flaky_queue.submit(answer, 1).result(timeout=5)
+    assert flaky_queue.submit(answer, 2).result(timeout=5) == 2
+
+
+def test_submit_fails_fast_when_the_queue_is_stopped():
+    write_queue = WriteQueue(SessionLocal)
+    with pytest.raises(RuntimeError, match="parada"):
+        write_queue.submit(answer, 1).result(timeout=5)
+
+    write_queue.start()
+    write_queue.stop()
+    with pytest.raises(RuntimeError, match="parada"):
+        write_queue.submit(answer, 1).result(timeout=5)
@@ -0,0 +1,128 @@
+"""
+Estado incremental do ETL (RunState): quais linhas pular, quais voltam
+depois de uma falha de carga e de onde retomar uma execução interrompida.
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from santander_etl_local import CSV_DTYPES, RunState, run_path
+
+
+def frame(rows) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=["UserID", "name", "email"])
+    return df.astype(CSV_DTYPES)
+
+
+USERS = [
+    (1, "Naruto Uzumaki", "naruto@konoha.com"),
+    (2, "Hinata Hyuga", "hinata@konoha.com"),
+    (3, "Sasuke Uchiha", "sasuke@konoha.com"),
+]
+
+
+@pytest.fixture
+def state(tmp_path):
+    state = RunState(str(tmp_path / "etl_state.db"))
+    yield state
+    state.close()
+
+
+def changed_ids(state, rows, skip_user_ids=()) -> list:
+    """Roda uma execução sobre `rows` e confirma o que foi processado"""
+    changed, hashes = state.changed_rows(frame(rows))
+    state.commit(hashes, skip_user_ids=skip_user_ids)
+    return changed["UserID"].tolist()
+
+
+def test_unchanged_rows_are_skipped(state):
+    assert not state.has_hashes()
+    assert changed_ids(state, USERS) == [1, 2, 3]
+    assert state.has_hashes()
+    assert changed_ids(state, USERS) == []
+
+
+def test_new_and_changed_rows_come_back(state):
+    changed_ids(state, USERS)
+    rows = [USERS[0], (2, "Hinata Uzumaki", "hinata@konoha.com"), USERS[2], (4, "Kakashi", "kakashi@konoha.com")]
+    assert changed_ids(state, rows) == [2, 4]
+
+
+def test_row_reverting_to_earlier_content_is_processed_again(state):
+    changed_ids(state, USERS)
+    renamed = [(1, "Naruto Hokage", "naruto@konoha.com")]
+    assert changed_ids(state, renamed) == [1]
+    assert changed_ids(state, USERS[:1]) == [1]
+    # Um hash por UserID, não um por conteúdo já visto
+    assert state.conn.execute("SELECT COUNT(*) FROM user_hashes").fetchone()[0] == 3
+
+
+def test_failed_load_is_retried_next_run(state):
+    changed, hashes = state.changed_rows(frame(USERS))
+    assert state.commit(hashes, skip_user_ids={2}) == 1
+    assert changed_ids(state, USERS) == [2]
+    assert changed_ids(state, USERS) == []
+
+
+def test_full_refresh_forgets_everything(state):
+    changed_ids(state, USERS)
+    state.reset()
+    assert not state.has_hashes()
+    assert changed_ids(state, USERS) == [1, 2, 3]
+
+
+@pytest.fixture
+def csv_path(tmp_path) -> str:
+    path = tmp_path / "SDW2023.csv"
+    frame(USERS).to_csv(path, index=False)
+    return str(path)
+
+
+def test_resume_offset_follows_the_checkpoint(state, csv_path):
+    assert state.resume_offset(csv_path) == 0
+
+    _, hashes = state.changed_rows(frame(USERS[:2]))
+    state.commit(hashes, csv_path, offset=2)
+    assert state.resume_offset(csv_path) == 2
+    assert state.resume_offset(csv_path + ".outro") == 0
+
+    # Execução completa: o checkpoint sai
+    state.commit(None)
+    assert state.resume_offset(csv_path) == 0
+
+
+def test_checkpoint_is_ignored_when_the_csv_changes(state, csv_path):
+    state.commit(None, csv_path, offset=2)
+
+    with open(csv_path, "a", encoding="utf-8") as file:
+        file.write("4,Kakashi,kakashi@konoha.com\n")
+    assert state.resume_offset(csv_path) == 0
+
+
+def test_checkpoint_survives_reopening(tmp_path, csv_path):
+    path = str(tmp_path / "etl_state.db")
+    state = RunState(path)
+    _, hashes = state.changed_rows(frame(USERS[:1]))
+    state.commit(hashes, csv_path, offset=1)
+    state.close()
+
+    # O processo morreu depois do checkpoint: a próxima execução retoma
+    state = RunState(path)
+    try:
+        assert state.resume_offset(csv_path) == 1
+        changed, _ = state.changed_rows(frame(USERS))
+        assert changed["UserID"].tolist() == [2, 3]
+    finally:
+        state.close()
+
+
+@pytest.mark.parametrize("delta, offset, expected", [
+    (None, 0, "users_report.csv"),
+    (None, 80000, "users_report.from-80000.csv"),
+    ("20240101T120000", 0, "users_report.delta-20240101T120000.csv"),
+    ("20240101T120000", 500, "users_report.delta-20240101T120000.from-500.csv"),
+])
+def test_each_run_writes_its_own_files(delta, offset, expected):
+    path = os.path.join("output", "users_report.csv")
+    assert run_path(path, delta, offset) == os.path.join("output", expected)